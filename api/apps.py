@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from dashboard.signals import sales_committed, stock_alerts_committed
+
+        from .events import publish_sales, publish_stock_alerts
+
+        sales_committed.connect(publish_sales)
+        stock_alerts_committed.connect(publish_stock_alerts)
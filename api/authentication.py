@@ -0,0 +1,42 @@
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from dashboard.auth_backend import (
+    AUTH_CACHE_ALIAS,
+    PhoneBackend,
+    device_cache_key,
+)
+from dashboard.models import Device
+
+
+class DeviceTokenAuthentication(TokenAuthentication):
+    """Authenticate POS devices by "Authorization: Token <token>".
+
+    Tokens are looked up by their hash through the auth cache, as are their
+    users, so a known device costs no queries. Revoking a device drops its
+    token from the cache of the process that revoked it; other processes
+    stop accepting it within the cache TIMEOUT. Token requests need no CSRF
+    token.
+    """
+
+    model = Device
+
+    def authenticate_credentials(self, key):
+        token_hash = Device.hash_token(key)
+        cache = caches[AUTH_CACHE_ALIAS]
+        cache_key = device_cache_key(token_hash)
+        device = cache.get(cache_key)
+        if device is None:
+            device = (
+                Device.objects.filter(token_hash=token_hash, revoked_at__isnull=True)
+                .values("id", "user_id")
+                .first()
+            )
+            if device is None:
+                raise exceptions.AuthenticationFailed("Invalid token.")
+            cache.set(cache_key, device)
+
+        user = PhoneBackend().get_user(device["user_id"])
+        if user is None:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        return (user, device["id"])
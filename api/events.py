@@ -0,0 +1,254 @@
+"""Server-Sent Events feed of committed sales and stock alerts for live
+dashboards.
+
+Served by a plain ASGI app (see conf/asgi.py) because Django 3.2 can't
+stream a response asynchronously. Sales are published once per commit by
+one in-process broadcaster that fans out to every connected client, so
+open dashboards cost no queries of their own. Each process only sees the
+sales it commits itself: run the ASGI server with a single worker process.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from http.cookies import SimpleCookie
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import HttpRequest
+from dashboard.models import StockAlert
+from dashboard.utils import business_date, business_today
+
+from .reports import get_sales_totals
+from .serializers import SaleSerializer, StockAlertSerializer
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = "/api/events/"
+
+# Seconds between comment lines that keep idle connections open through
+# proxies
+KEEPALIVE_SECONDS = 20
+
+# Events buffered per client before it is told to resync instead
+CLIENT_QUEUE_SIZE = 100
+
+
+class Broadcaster:
+    """Fans events out to the queues of every connected client.
+
+    publish() may be called from any thread; events are handed to each
+    client's event loop with call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def has_clients(self):
+        return bool(self._clients)
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        with self._lock:
+            self._clients.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._clients = {
+                client for client in self._clients if client[1] is not queue
+            }
+
+    def publish(self, event_type, data):
+        event = (next(self._ids), event_type, data)
+        with self._lock:
+            clients = list(self._clients)
+        for loop, queue in clients:
+            loop.call_soon_threadsafe(self._deliver, queue, event)
+
+    def _deliver(self, queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind reloads its totals instead of
+            # receiving the backlog
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait((event[0], "resync", {}))
+
+
+broadcaster = Broadcaster()
+
+
+def format_event(event_id, event_type, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode()
+
+
+def get_breakdown_deltas(sales, key):
+    """Sales total and count of today's sales, grouped by a name"""
+    deltas = {}
+    for sale in sales:
+        name = key(sale)
+        total, count = deltas.get(name, (0, 0))
+        deltas[name] = (total + sale.total_amount, count + 1)
+    return [
+        {"name": name, "total": float(total), "count": count}
+        for name, (total, count) in deltas.items()
+    ]
+
+
+def publish_sales(sender, sales, **kwargs):
+    """sales_committed receiver: push today's new sales with the updated
+    totals to every connected dashboard"""
+    if not broadcaster.has_clients:
+        return
+
+    today = business_today()
+    todays_sales = [sale for sale in sales if business_date(sale.created_at) == today]
+    if not todays_sales:
+        return
+
+    try:
+        totals = get_sales_totals(today)
+
+        broadcaster.publish(
+            "sales",
+            {
+                "business_date": today,
+                "sales": SaleSerializer(todays_sales, many=True).data,
+                "today_total": totals["today_total"],
+                "today_count": totals["today_count"],
+                "monthly_total": totals["monthly_total"],
+                "category_deltas": get_breakdown_deltas(
+                    todays_sales, lambda sale: sale.category_name
+                ),
+                "payment_deltas": get_breakdown_deltas(
+                    todays_sales, lambda sale: sale.payment_method_name
+                ),
+            },
+        )
+    except Exception as e:
+        # The sales are committed; a lost live update mustn't fail the request
+        logger.error("Error publishing sales event: %s", e)
+
+
+def publish_stock_alerts(sender, alerts, **kwargs):
+    """stock_alerts_committed receiver: push products' stock status changes
+    to every connected client"""
+    if not broadcaster.has_clients:
+        return
+
+    try:
+        alerts = StockAlert.objects.select_related("product").filter(
+            pk__in=[alert.pk for alert in alerts]
+        )
+        broadcaster.publish(
+            "stock", {"alerts": StockAlertSerializer(alerts, many=True).data}
+        )
+    except Exception as e:
+        # The stock change is committed; a lost live update mustn't fail the
+        # request, and the alert stays in the feed
+        logger.error("Error publishing stock event: %s", e)
+
+
+def load_user(session_key):
+    """Authenticated user owning a session, or None"""
+    try:
+        request = HttpRequest()
+        engine = import_module(settings.SESSION_ENGINE)
+        request.session = engine.SessionStore(session_key)
+        user = get_user(request)
+        return user if user.is_authenticated else None
+    finally:
+        close_old_connections()
+
+
+async def authenticate(scope):
+    cookies = SimpleCookie()
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            cookies.load(value.decode("latin-1"))
+    session = cookies.get(settings.SESSION_COOKIE_NAME)
+    if session is None:
+        return None
+    return await sync_to_async(load_user)(session.value)
+
+
+async def send_error(send, status, message):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send(
+        {"type": "http.response.body", "body": json.dumps({"error": message}).encode()}
+    )
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def event_stream(scope, receive, send):
+    """ASGI app streaming sales events to an authenticated client"""
+    if scope["method"] != "GET":
+        await send_error(send, 405, "Method not allowed")
+        return
+    if await authenticate(scope) is None:
+        await send_error(send, 403, "Authentication credentials were not provided.")
+        return
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                # Stop nginx buffering the stream
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+    queue = broadcaster.subscribe()
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    next_event = asyncio.ensure_future(queue.get())
+    try:
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b"retry: 5000\n\n",
+                "more_body": True,
+            }
+        )
+        while True:
+            done, _ = await asyncio.wait(
+                {disconnected, next_event},
+                timeout=KEEPALIVE_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                break
+            if next_event in done:
+                body = format_event(*next_event.result())
+                next_event = asyncio.ensure_future(queue.get())
+            else:
+                body = b": keep-alive\n\n"
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+    finally:
+        next_event.cancel()
+        disconnected.cancel()
+        broadcaster.unsubscribe(queue)
@@ -0,0 +1,53 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+
+# Returned by next() once a streaming response is exhausted
+_DONE = object()
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """Django's ASGI handler, reading streaming responses in a thread.
+
+    Django 3.2 iterates a streaming response on the event loop, so a
+    generator that runs queries as it goes (like the sales export) raises
+    SynchronousOnlyOperation after the headers are sent. Here each part is
+    produced by sync_to_async, in the thread the view ran in, so it uses the
+    request's database connection.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode("ascii")
+            if isinstance(value, str):
+                value = value.encode("latin1")
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append(
+                (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": headers,
+            }
+        )
+
+        parts = iter(response)
+        next_part = sync_to_async(next, thread_sensitive=True)
+        while True:
+            part = await next_part(parts, _DONE)
+            if part is _DONE:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
@@ -0,0 +1,64 @@
+"""Prometheus metrics for the API, served at /metrics.
+
+Under gunicorn, gunicorn.conf.py points PROMETHEUS_MULTIPROC_DIR at a
+shared directory before the workers start: every worker then writes its
+samples to memory-mapped files there, and /metrics adds up all of them.
+"""
+
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUESTS = Counter(
+    "api_requests_total", "API requests handled", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Time spent handling API requests",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_ERRORS = Counter(
+    "api_request_errors_total",
+    "API requests that failed with a server error",
+    ["method", "route"],
+)
+SALES_CREATED = Counter(
+    "sales_created_total", "Sales recorded through the API", ["endpoint"]
+)
+STOCK_REJECTIONS = Counter(
+    "sales_stock_rejections_total",
+    "Sales rejected because the product didn't have enough stock",
+    ["endpoint"],
+)
+
+
+def get_registry():
+    """Registry to export: all workers' samples in multiprocess mode,
+    otherwise this process's"""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Metrics in the Prometheus text format. If METRICS_TOKEN is set,
+    scrapers must send it as a bearer token."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,155 @@
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from dashboard.routers import replica_configured, tracking_writes
+
+from .metrics import REQUEST_ERRORS, REQUEST_LATENCY, REQUESTS
+from .query_budget import check_query_budget
+from .timing import RequestTiming, current_timing
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """Fail /api/ requests that run more queries than their declared budget.
+
+    Debug aid only: enabled with the QUERY_BUDGET_ENFORCED setting.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_BUDGET_ENFORCED", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        if match is not None and match.url_name:
+            check_query_budget(request.method, match.url_name, context.captured_queries)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Keep a client's reads on the primary for a while after it wrote.
+
+    Report reads opted in to the replica skip it for the rest of a request
+    that wrote, and, through a cookie, for REPLICA_PIN_SECONDS after it, so
+    the client doesn't miss its own writes while the replica catches up.
+    """
+
+    cookie_name = "replica_pin"
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = self.cookie_name in request.COOKIES
+        with tracking_writes(pinned) as state:
+            response = self.get_response(request)
+
+        if state.wrote:
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class MetricsMiddleware:
+    """Count /api/ requests and record their latency per route.
+
+    Routes are labelled by URL name (e.g. "sale-list"), which keeps the
+    number of series bounded whatever the URL parameters.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.url_name if match is not None and match.url_name else "unmatched"
+        REQUESTS.labels(request.method, route, response.status_code).inc()
+        REQUEST_LATENCY.labels(request.method, route).observe(duration)
+        if response.status_code >= 500:
+            REQUEST_ERRORS.labels(request.method, route).inc()
+        return response
+
+
+class ServerTimingMiddleware:
+    """Report where /api/ requests spend their time.
+
+    Sampled requests get a Server-Timing header and a log line with their
+    query count, DB time, serializer time and total view time. Serializer
+    time includes any queries run while serializing. The fraction of
+    requests sampled is set by SERVER_TIMING_SAMPLE_RATE (0 disables it).
+    """
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith("/api/") or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timing.record_query):
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        view_time = time.perf_counter() - started
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timing.db_time * 1000:.1f};desc="{timing.db_queries} queries"',
+                f"serializer;dur={timing.serializer_time * 1000:.1f}",
+                f"view;dur={view_time * 1000:.1f}",
+            ]
+        )
+        logger.info(
+            "%s %s %s in %.1fms",
+            request.method,
+            request.path,
+            response.status_code,
+            view_time * 1000,
+            extra={
+                "timing": {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "db_queries": timing.db_queries,
+                    "db_ms": round(timing.db_time * 1000, 2),
+                    "serializer_ms": round(timing.serializer_time * 1000, 2),
+                    "view_ms": round(view_time * 1000, 2),
+                }
+            },
+        )
+        return response
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class SaleCursorPagination(CursorPagination):
+    """Newest-first keyset pagination over sales.
+
+    Pages continue from an opaque cursor instead of an OFFSET and run no
+    COUNT(*), so page N costs the same as page 1; id breaks ties between
+    sales created in the same instant.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# Maximum number of queries each API endpoint may run, keyed by
+# (HTTP method, URL name). Counts include the two queries session auth
+# spends loading the session and, when it isn't cached yet, the user, and
+# for writes the transaction statements, the first-of-the-period inserts of
+# sales rollup and product counter rows, and recording a stock alert.
+# Catalog GETs spend one more reading the catalog version for their ETag,
+# and stock changes one more bumping it after commit, or three more if the
+# version row doesn't exist yet.
+#
+# A checkout's worst case is 30: session and user (2), product and payment
+# method (2), BEGIN, the stock UPDATE, its status check, UPDATE and alert
+# (5), the sale (1), the rollup and day, week and month counters each
+# missing their UPDATE and inserting under a savepoint (16), and creating
+# the catalog version (4).
+QUERY_BUDGETS = {
+    ("GET", "sale-list"): 3,
+    ("POST", "sale-list"): 30,
+    ("GET", "sale-detail"): 3,
+    ("GET", "sale-today"): 3,
+    ("GET", "sale-recent"): 3,
+    ("GET", "sale-monthly"): 3,
+    # Only counts the queries before streaming starts; the export then reads
+    # one query per EXPORT_CHUNK_SIZE rows
+    ("GET", "sale-export"): 2,
+    ("GET", "order-list"): 5,
+    ("GET", "order-detail"): 4,
+    ("GET", "stockalert-list"): 3,
+    ("GET", "product-list"): 4,
+    ("GET", "product-detail"): 4,
+    ("GET", "product-by-category"): 4,
+    ("GET", "product-stockable"): 4,
+    ("GET", "product-non-stockable"): 4,
+    ("GET", "product-low-stock"): 4,
+    ("GET", "product-quick-actions"): 4,
+    # Not tagged with the catalog version, so no ETag query
+    ("GET", "product-top"): 3,
+    ("GET", "paymentmethod-list"): 5,
+    ("GET", "category-list"): 5,
+    ("GET", "dashboard-data"): 5,
+    # Only counts the request thread; its report queries run in a thread pool
+    ("GET", "dashboard-data-async"): 2,
+    ("GET", "today-sales-count"): 3,
+    ("GET", "reports-timeseries"): 3,
+    ("GET", "test-api"): 6,
+    ("POST", "device-register"): 2,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def get_query_budget(method, url_name):
+    """Declared query budget for an endpoint, or None if it has none"""
+    return QUERY_BUDGETS.get((method.upper(), url_name))
+
+
+def check_query_budget(method, url_name, queries):
+    """Raise QueryBudgetExceeded if the captured queries exceed the budget"""
+    budget = get_query_budget(method, url_name)
+    if budget is None or len(queries) <= budget:
+        return
+
+    executed = "\n".join(
+        f"{index}. {query['sql']}" for index, query in enumerate(queries, start=1)
+    )
+    raise QueryBudgetExceeded(
+        f"{method} {url_name} ran {len(queries)} queries, budget is {budget}:\n"
+        f"{executed}"
+    )
+
+
+@contextmanager
+def assert_query_budget(method, url_name, using=DEFAULT_DB_ALIAS):
+    """Fail if the wrapped block runs more queries than the endpoint's budget.
+
+    Usage in tests:
+
+        with assert_query_budget("GET", "sale-list"):
+            self.client.get(reverse("sale-list"))
+    """
+    if get_query_budget(method, url_name) is None:
+        raise QueryBudgetExceeded(f"No query budget declared for {method} {url_name}")
+
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    check_query_budget(method, url_name, context.captured_queries)
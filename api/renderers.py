@@ -0,0 +1,47 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class Echo:
+    """File-like object whose write() hands the value back, so csv.writer
+    can format lines without buffering them"""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render a dict (e.g. an error) as a header row and a value row"""
+        return "".join(self.render_chunks(list(data.keys()), [[data.values()]]))
+
+    def render_chunks(self, header, chunks):
+        """Yield the header line, then one string per chunk of rows"""
+        writer = csv.writer(Echo())
+        yield writer.writerow(header)
+        for rows in chunks:
+            yield "".join(writer.writerow(row) for row in rows)
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder) + "\n"
+
+    def render_chunks(self, header, chunks):
+        """Yield one string per chunk of rows, a JSON object per line"""
+        for rows in chunks:
+            yield "".join(
+                json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n"
+                for row in rows
+            )
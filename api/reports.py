@@ -0,0 +1,243 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncHour, TruncWeek
+from dashboard.models import DailySalesRollup, Sale
+from dashboard.utils import BUSINESS_TIMEZONE, business_day_bounds
+
+from .serializers import SaleSerializer
+
+# Threads running dashboard queries for async views. Each holds its own
+# database connection, so this also caps the connections they use.
+DASHBOARD_QUERY_WORKERS = 8
+
+dashboard_executor = ThreadPoolExecutor(
+    max_workers=DASHBOARD_QUERY_WORKERS, thread_name_prefix="dashboard-query"
+)
+
+
+def get_sales_totals(today):
+    """Today's and the month's sales totals and counts, in one pass over
+    the month's daily rollup"""
+    is_today = Q(business_date=today)
+    totals = DailySalesRollup.objects.filter(
+        business_date__gte=today.replace(day=1)
+    ).aggregate(
+        today_total=Sum("total_amount", filter=is_today),
+        today_count=Sum("sale_count", filter=is_today),
+        monthly_total=Sum("total_amount"),
+        monthly_count=Sum("sale_count"),
+    )
+    return {
+        "today_total": float(totals["today_total"] or 0),
+        "today_count": totals["today_count"] or 0,
+        "monthly_total": float(totals["monthly_total"] or 0),
+        "monthly_count": totals["monthly_count"] or 0,
+    }
+
+
+def get_dashboard_totals(today):
+    totals = get_sales_totals(today)
+    return {
+        "today_total": totals["today_total"],
+        "today_count": totals["today_count"],
+        "monthly_total": totals["monthly_total"],
+    }
+
+
+def get_recent_sales(today):
+    """The last 5 sales"""
+    sales = Sale.objects.all()[:5]
+    return {"recent_sales": SaleSerializer(sales, many=True).data}
+
+
+def get_breakdowns(today):
+    """Today's sales total and count per category and per payment method,
+    both folded from one query grouped by the pair"""
+    rows = (
+        DailySalesRollup.objects.filter(business_date=today)
+        .values("category__name", "payment_method__name")
+        .annotate(total=Sum("total_amount"), count=Sum("sale_count"))
+        .order_by()
+    )
+    categories = {}
+    payment_methods = {}
+    for row in rows:
+        for breakdown, name in (
+            (categories, row["category__name"]),
+            (payment_methods, row["payment_method__name"]),
+        ):
+            total, count = breakdown.get(name, (0, 0))
+            breakdown[name] = (total + row["total"], count + row["count"])
+
+    def by_total(breakdown, key):
+        return [
+            {key: name, "total": total, "count": count}
+            for name, (total, count) in sorted(
+                breakdown.items(), key=lambda item: item[1][0], reverse=True
+            )
+        ]
+
+    return {
+        "category_breakdown": by_total(categories, "product__category__name"),
+        "payment_breakdown": by_total(payment_methods, "payment_method__name"),
+    }
+
+
+# Most days of sales one time series request may cover, per bucket size
+TIMESERIES_MAX_DAYS = {"hour": 31, "day": 731, "week": 1827}
+
+# What each time series group_by groups by, in the daily rollup and in sales
+TIMESERIES_GROUPS = {
+    "category": "category",
+    "payment": "payment_method",
+    "product": "product",
+}
+
+
+def get_timeseries_buckets(date_from, date_to, bucket):
+    """Start of every bucket between two business dates (inclusive): aware
+    datetimes for hours, dates for days and weeks (weeks start on Monday)"""
+    if bucket == "hour":
+        start, _ = business_day_bounds(date_from)
+        hours = ((date_to - date_from).days + 1) * 24
+        return [
+            BUSINESS_TIMEZONE.normalize(start + timedelta(hours=hour))
+            for hour in range(hours)
+        ]
+    step = 7 if bucket == "week" else 1
+    day = date_from - timedelta(days=date_from.weekday() if bucket == "week" else 0)
+    buckets = []
+    while day <= date_to:
+        buckets.append(day)
+        day += timedelta(days=step)
+    return buckets
+
+
+def get_timeseries_rows(date_from, date_to, bucket, group_by=None):
+    """Sales per bucket (and group), aggregated by the database. Days and
+    weeks are summed from the daily rollup; hours from the sales themselves."""
+    if bucket == "hour":
+        start = business_day_bounds(date_from)[0]
+        end = business_day_bounds(date_to)[1]
+        rows = Sale.objects.filter(created_at__gte=start, created_at__lt=end)
+        bucket_start = TruncHour("created_at", tzinfo=BUSINESS_TIMEZONE)
+        totals = {
+            "total": Sum("total_amount"),
+            "count": Count("id"),
+            "quantity": Sum("quantity"),
+        }
+    else:
+        rows = DailySalesRollup.objects.filter(
+            business_date__gte=date_from, business_date__lte=date_to
+        )
+        bucket_start = (
+            TruncWeek("business_date") if bucket == "week" else F("business_date")
+        )
+        totals = {
+            "total": Sum("total_amount"),
+            "count": Sum("sale_count"),
+            "quantity": Sum("quantity"),
+        }
+
+    columns = {"bucket": bucket_start}
+    if group_by:
+        # Grouped on ids and labelled with the current names, whichever
+        # table the rows come from, so a renamed series stays one series
+        group = TIMESERIES_GROUPS[group_by]
+        columns["group_id"] = F(group)
+        columns["name"] = F(f"{group}__name")
+    return rows.values(**columns).annotate(**totals).order_by()
+
+
+def get_sales_timeseries(date_from, date_to, bucket="day", group_by=None):
+    """Sales totals, counts and quantities per bucket between two business
+    dates (inclusive), zero-filled. One series per category, payment method
+    or product with group_by, with its id and current name, sorted by total;
+    otherwise one series with id and name None."""
+    buckets = get_timeseries_buckets(date_from, date_to, bucket)
+    positions = {start: index for index, start in enumerate(buckets)}
+
+    def empty_series(group_id, name):
+        return {
+            "id": group_id,
+            "name": name,
+            "total": [0.0] * len(buckets),
+            "count": [0] * len(buckets),
+            "quantity": [0] * len(buckets),
+        }
+
+    series = {} if group_by else {None: empty_series(None, None)}
+    for row in get_timeseries_rows(date_from, date_to, bucket, group_by):
+        group_id = row.get("group_id")
+        if group_id not in series:
+            series[group_id] = empty_series(group_id, row.get("name"))
+        index = positions[row["bucket"]]
+        series[group_id]["total"][index] = float(row["total"] or 0)
+        series[group_id]["count"][index] = row["count"] or 0
+        series[group_id]["quantity"][index] = row["quantity"] or 0
+
+    return {
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "bucket": bucket,
+        "group_by": group_by,
+        "buckets": [start.isoformat() for start in buckets],
+        "series": sorted(
+            series.values(), key=lambda values: sum(values["total"]), reverse=True
+        ),
+    }
+
+
+# The independent parts of the dashboard data, in response key order
+DASHBOARD_PARTS = [
+    get_dashboard_totals,
+    get_recent_sales,
+    get_breakdowns,
+]
+
+
+def get_dashboard_data(today):
+    """Dashboard data for a business date, one query after another"""
+    data = {}
+    for part in DASHBOARD_PARTS:
+        data.update(part(today))
+    return data
+
+
+def run_in_worker(part, today):
+    # Pool threads outlive requests, so manage their connections the way
+    # Django does around each request
+    close_old_connections()
+    try:
+        return part(today)
+    finally:
+        close_old_connections()
+
+
+async def get_dashboard_data_concurrently(today):
+    """Dashboard data for a business date, running its queries in parallel
+    on the dashboard thread pool"""
+    loop = asyncio.get_running_loop()
+    # Each part runs in a copy of the caller's context, so it reads from the
+    # database the caller would (see dashboard/routers.py)
+    results = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                dashboard_executor,
+                contextvars.copy_context().run,
+                run_in_worker,
+                part,
+                today,
+            )
+            for part in DASHBOARD_PARTS
+        )
+    )
+    data = {}
+    for result in results:
+        data.update(result)
+    return data
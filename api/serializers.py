@@ -1,26 +1,40 @@
 from rest_framework import serializers
-from dashboard.models import Sale, PaymentMethod, Category, Product
+from dashboard.models import (
+    Sale,
+    PaymentMethod,
+    Category,
+    Product,
+    ProductSalesCounter,
+    StockAlert,
+    Device,
+    Order,
+)
 
+from .timing import TimedListSerializer, TimedSerializerMixin
 
-class PaymentMethodSerializer(serializers.ModelSerializer):
+
+class PaymentMethodSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = PaymentMethod
+        list_serializer_class = TimedListSerializer
         fields = ["id", "name", "is_active"]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
+        list_serializer_class = TimedListSerializer
         fields = ["id", "name", "is_active"]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source="category.name", read_only=True)
     is_low_stock = serializers.BooleanField(read_only=True)
     is_out_of_stock = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Product
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "name",
@@ -32,23 +46,69 @@ class ProductSerializer(serializers.ModelSerializer):
             "min_stock_level",
             "is_low_stock",
             "is_out_of_stock",
+            "stock_status",
             "is_quick_action",
             "is_active",
         ]
         read_only_fields = ["is_low_stock", "is_out_of_stock"]
 
+    def update(self, instance, validated_data):
+        # Sales change the stock meanwhile, so it is only set on creation and
+        # adjusted afterwards with the products' stock action
+        validated_data.pop("stock_quantity", None)
+        return super().update(instance, validated_data)
 
-class SaleSerializer(serializers.ModelSerializer):
-    product_name = serializers.CharField(source="product.name", read_only=True)
+
+class TopProductSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source="product.name", read_only=True)
     category_name = serializers.CharField(
         source="product.category.name", read_only=True
     )
-    payment_method_name = serializers.CharField(
-        source="payment_method.name", read_only=True
+
+    class Meta:
+        model = ProductSalesCounter
+        fields = [
+            "product",
+            "name",
+            "category_name",
+            "sale_count",
+            "quantity",
+            "total_amount",
+        ]
+
+
+class StockAlertSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source="product.name", read_only=True)
+
+    class Meta:
+        model = StockAlert
+        fields = [
+            "id",
+            "product",
+            "product_name",
+            "previous_status",
+            "status",
+            "stock_quantity",
+            "min_stock_level",
+            "created_at",
+        ]
+
+
+class SaleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Load the category with the product so snapshotting its name on save
+    # needs no extra query. The names are read from the sale's own columns.
+    product = serializers.PrimaryKeyRelatedField(
+        queryset=Product.objects.select_related("category")
+    )
+    # Uniqueness is handled by the views (a repeated key returns the recorded
+    # sale) rather than by a validator querying once per sale
+    client_key = serializers.CharField(
+        max_length=64, required=False, allow_null=True, validators=[]
     )
 
     class Meta:
         model = Sale
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "product",
@@ -62,6 +122,110 @@ class SaleSerializer(serializers.ModelSerializer):
             "customer_name",
             "customer_phone",
             "notes",
+            "client_key",
             "created_at",
         ]
         read_only_fields = ["total_amount", "created_at"]
+        # The column only rejects negatives, and at the database as a 500
+        extra_kwargs = {"quantity": {"min_value": 1}}
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field that resolves objects from a dict in the serializer
+    context instead of running a query per value"""
+
+    def __init__(self, context_key, **kwargs):
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        obj = self.context[self.context_key].get(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+class BulkSaleItemSerializer(SaleSerializer):
+    """One sale in a bulk request; products and payment methods are looked
+    up in the "products" and "payment_methods" dicts of the context"""
+
+    product = PrefetchedPrimaryKeyRelatedField(
+        "products", queryset=Product.objects.all()
+    )
+    payment_method = PrefetchedPrimaryKeyRelatedField(
+        "payment_methods", queryset=PaymentMethod.objects.all()
+    )
+
+
+class OrderLineSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """One line of an order; products are looked up in the "products" dict
+    of the context"""
+
+    product = PrefetchedPrimaryKeyRelatedField(
+        "products", queryset=Product.objects.all()
+    )
+
+    class Meta:
+        model = Sale
+        list_serializer_class = TimedListSerializer
+        fields = [
+            "id",
+            "product",
+            "product_name",
+            "category_name",
+            "quantity",
+            "unit_price",
+            "total_amount",
+        ]
+        read_only_fields = ["total_amount"]
+        extra_kwargs = {"quantity": {"min_value": 1}}
+
+
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    payment_method_name = serializers.CharField(
+        source="payment_method.name", read_only=True
+    )
+    lines = OrderLineSerializer(many=True)
+    # As on SaleSerializer, the views handle repeated keys
+    client_key = serializers.CharField(
+        max_length=64, required=False, allow_null=True, validators=[]
+    )
+
+    class Meta:
+        model = Order
+        list_serializer_class = TimedListSerializer
+        fields = [
+            "id",
+            "payment_method",
+            "payment_method_name",
+            "customer_name",
+            "customer_phone",
+            "notes",
+            "client_key",
+            "total_amount",
+            "lines",
+            "created_at",
+        ]
+        read_only_fields = ["total_amount", "created_at"]
+
+    def validate_lines(self, lines):
+        if not lines:
+            raise serializers.ValidationError("An order needs at least one line.")
+        return lines
+
+
+class DeviceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Device
+        fields = ["id", "name", "created_at"]
+
+
+class DeviceRegistrationSerializer(serializers.Serializer):
+    phone = serializers.CharField()
+    password = serializers.CharField(trim_whitespace=False, write_only=True)
+    name = serializers.CharField(max_length=100)
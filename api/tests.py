@@ -1,3 +1,591 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError
+from django.db.models import ProtectedError
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from conf.asgi import application
+from dashboard.models import (
+    CatalogVersion,
+    Category,
+    DailySalesRollup,
+    InsufficientStock,
+    Order,
+    PaymentMethod,
+    Product,
+    ProductSalesCounter,
+    Sale,
+    StockAlert,
+    User,
+)
+from dashboard.signals import sales_committed
+from dashboard.utils import business_today
+
+from .query_budget import QUERY_BUDGETS, assert_query_budget
+from .serializers import SaleSerializer
+
+
+class ApiTestMixin:
+    def create_fixtures(self):
+        # Cached users would outlive the previous test's rows
+        caches["auth"].clear()
+        self.user = User.objects.create_user(
+            "01700000000", "Test", "User", password="secret"
+        )
+        self.category = Category.objects.create(name="Snacks")
+        self.payment_method = PaymentMethod.objects.create(name="Cash")
+        self.product = Product.objects.create(
+            name="Biscuits",
+            category=self.category,
+            product_type="stockable",
+            price=Decimal("20.00"),
+            stock_quantity=100,
+            min_stock_level=5,
+            is_quick_action=True,
+        )
+
+    def sale_data(self, **fields):
+        return {
+            "product": self.product.pk,
+            "payment_method": self.payment_method.pk,
+            "quantity": 1,
+            "unit_price": "20.00",
+            **fields,
+        }
+
+    def request(self, method, url_name, kwargs=None, data=None):
+        url = reverse(url_name, kwargs=kwargs)
+        if method == "GET":
+            return self.client.get(url, data)
+        return self.client.post(url, data, content_type="application/json")
+
+
+class QueryBudgetTests(ApiTestMixin, TransactionTestCase):
+    """Every endpoint with a query budget stays within it, with the auth
+    cache cold and warm. Transactions really commit here, so the queries run
+    after commit are counted too."""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.sale = Sale(
+            product=self.product,
+            payment_method=self.payment_method,
+            quantity=1,
+            unit_price=Decimal("20.00"),
+        )
+        self.sale.save()
+        self.order = Order(payment_method=self.payment_method)
+        Order.place(
+            self.order,
+            [Sale(product=self.product, quantity=2, unit_price=Decimal("20.00"))],
+        )
+        # Drop the product into low stock, recording a stock alert
+        Product.change_stock(self.product.pk, -92)
+        self.client.force_login(self.user)
+
+    def get_requests(self):
+        """(method, URL name, URL kwargs, data) of a request to each endpoint"""
+        today = business_today()
+        return [
+            ("GET", "sale-list", None, None),
+            ("POST", "sale-list", None, self.sale_data()),
+            ("GET", "sale-detail", {"pk": self.sale.pk}, None),
+            ("GET", "sale-today", None, None),
+            ("GET", "sale-recent", None, None),
+            ("GET", "sale-monthly", None, None),
+            ("GET", "sale-export", None, {"from": today, "format": "csv"}),
+            ("GET", "order-list", None, None),
+            ("GET", "order-detail", {"pk": self.order.pk}, None),
+            ("GET", "stockalert-list", None, None),
+            ("GET", "product-list", None, None),
+            ("GET", "product-detail", {"pk": self.product.pk}, None),
+            ("GET", "product-by-category", None, {"category_id": self.category.pk}),
+            ("GET", "product-stockable", None, None),
+            ("GET", "product-non-stockable", None, None),
+            ("GET", "product-low-stock", None, None),
+            ("GET", "product-quick-actions", None, None),
+            ("GET", "product-top", None, {"period": "week"}),
+            ("GET", "paymentmethod-list", None, None),
+            ("GET", "category-list", None, None),
+            ("GET", "dashboard-data", None, None),
+            ("GET", "dashboard-data-async", None, None),
+            ("GET", "today-sales-count", None, None),
+            (
+                "GET",
+                "reports-timeseries",
+                None,
+                {"from": today - timedelta(days=6), "group_by": "category"},
+            ),
+            ("GET", "test-api", None, None),
+            (
+                "POST",
+                "device-register",
+                None,
+                {"phone": self.user.phone, "password": "secret", "name": "Till 1"},
+            ),
+        ]
+
+    def test_every_budgeted_endpoint_is_covered(self):
+        requests = {(method, name) for method, name, _, _ in self.get_requests()}
+        self.assertEqual(requests, set(QUERY_BUDGETS))
+
+    def test_endpoints_stay_within_budget(self):
+        for method, url_name, kwargs, data in self.get_requests():
+            caches["auth"].clear()
+            for cache_state in ("cold", "warm"):
+                with self.subTest(method=method, url_name=url_name, cache=cache_state):
+                    with assert_query_budget(method, url_name):
+                        response = self.request(method, url_name, kwargs, data)
+                    self.assertLess(response.status_code, 400)
+
+    def test_first_checkout_of_the_period_stays_within_budget(self):
+        # Nothing recorded yet for the day, week or month, a sale that takes
+        # the product into low stock, and the first catalog bump
+        Product.change_stock(self.product.pk, 90)
+        DailySalesRollup.objects.all().delete()
+        ProductSalesCounter.objects.all().delete()
+        CatalogVersion.objects.all().delete()
+        alerts = StockAlert.objects.count()
+        caches["auth"].clear()
+
+        quantity = Product.objects.get(pk=self.product.pk).stock_quantity - 5
+        with assert_query_budget("POST", "sale-list"):
+            response = self.request(
+                "POST", "sale-list", data=self.sale_data(quantity=quantity)
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(StockAlert.objects.count(), alerts + 1)
+        self.assertEqual(DailySalesRollup.objects.count(), 1)
+        self.assertEqual(ProductSalesCounter.objects.count(), 3)
+        self.assertEqual(CatalogVersion.current(), 2)
+
+
+class SaleTotalsTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.client.force_login(self.user)
+
+    def test_deleting_a_sale_after_recategorising_its_product(self):
+        response = self.request("POST", "sale-list", data=self.sale_data(quantity=3))
+        self.assertEqual(response.status_code, 201)
+
+        drinks = Category.objects.create(name="Drinks")
+        self.product.category = drinks
+        self.product.save()
+        response = self.client.delete(
+            reverse("sale-detail", kwargs={"pk": response.json()["id"]})
+        )
+        self.assertEqual(response.status_code, 204)
+
+        # The sale comes off the category it was recorded under
+        self.assertFalse(DailySalesRollup.objects.filter(sale_count__gt=0).exists())
+        self.assertFalse(DailySalesRollup.objects.filter(category=drinks).exists())
+        self.assertFalse(ProductSalesCounter.objects.filter(sale_count__gt=0).exists())
+
+    def test_a_category_with_recorded_sales_cannot_be_deleted(self):
+        response = self.request("POST", "sale-list", data=self.sale_data())
+        self.assertEqual(response.status_code, 201)
+        drinks = Category.objects.create(name="Drinks")
+        self.product.category = drinks
+        self.product.save()
+
+        with self.assertRaises(ProtectedError):
+            self.category.delete()
+        self.assertTrue(Sale.objects.filter(pk=response.json()["id"]).exists())
+
+    def test_bulk_returns_the_recorded_sales_with_their_ids(self):
+        published = []
+
+        def receiver(sender, sales, **kwargs):
+            published.extend(sale.pk for sale in sales)
+
+        sales_committed.connect(receiver)
+        self.addCleanup(sales_committed.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request(
+                "POST",
+                "sale-bulk",
+                data=[self.sale_data(quantity=1), self.sale_data(quantity=2)],
+            )
+
+        self.assertEqual(response.status_code, 201)
+        ids = [sale["id"] for sale in response.json()["sales"]]
+        self.assertNotIn(None, ids)
+        self.assertEqual(
+            [Sale.objects.get(pk=pk).quantity for pk in ids],
+            [1, 2],
+        )
+        self.assertEqual(published, ids)
+        # Sales sent without a key aren't given one
+        self.assertEqual(
+            [sale["client_key"] for sale in response.json()["sales"]], [None, None]
+        )
+        self.assertFalse(Sale.objects.exclude(client_key=None).exists())
+
+
+class TimeseriesTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.client.force_login(self.user)
+
+    def test_buckets_label_groups_alike_after_a_rename(self):
+        self.request("POST", "sale-list", data=self.sale_data(quantity=2))
+        self.product.name = "Cookies"
+        self.product.save()
+        self.category.name = "Bakery"
+        self.category.save()
+
+        today = business_today()
+        for group_by, group in (
+            ("product", self.product),
+            ("category", self.category),
+        ):
+            for bucket in ("hour", "day", "week"):
+                with self.subTest(group_by=group_by, bucket=bucket):
+                    response = self.request(
+                        "GET",
+                        "reports-timeseries",
+                        data={
+                            "from": today,
+                            "to": today,
+                            "bucket": bucket,
+                            "group_by": group_by,
+                        },
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    series = response.json()["series"]
+                    self.assertEqual(
+                        [(line["id"], line["name"]) for line in series],
+                        [(group.pk, group.name)],
+                    )
+                    self.assertEqual(sum(series[0]["quantity"]), 2)
+
+
+class ProductStockEditTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.client.force_login(self.user)
+        self.url = reverse("product-detail", kwargs={"pk": self.product.pk})
+
+    def test_saving_a_product_keeps_stock_taken_meanwhile(self):
+        product = Product.objects.get(pk=self.product.pk)
+        Product.change_stock(product.pk, -3)
+
+        product.price = Decimal("25.00")
+        product.save()
+
+        product = Product.objects.get(pk=product.pk)
+        self.assertEqual(product.price, Decimal("25.00"))
+        self.assertEqual(product.stock_quantity, 97)
+
+    def test_updates_through_the_api_leave_the_stock_alone(self):
+        Product.change_stock(self.product.pk, -3)
+
+        response = self.client.patch(
+            self.url,
+            {"price": "22.00", "stock_quantity": 100},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["stock_quantity"], 97)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 97)
+
+    def test_stock_action_applies_a_change_to_the_current_stock(self):
+        url = reverse("product-stock", kwargs={"pk": self.product.pk})
+        Product.change_stock(self.product.pk, -3)
+
+        response = self.client.post(
+            url, {"change": 10}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["stock_quantity"], 107)
+
+        for change in (-200, 0, "5", None):
+            response = self.client.post(
+                url, {"change": change}, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 107)
+
+
+class OrderTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.client.force_login(self.user)
+        self.scarce = Product.objects.create(
+            name="Muffins",
+            category=self.category,
+            product_type="stockable",
+            price=Decimal("50.00"),
+            stock_quantity=5,
+        )
+
+    def order_data(self, *lines, **fields):
+        return {
+            "payment_method": self.payment_method.pk,
+            "lines": [
+                {"product": product.pk, "quantity": quantity, "unit_price": "10.00"}
+                for product, quantity in lines
+            ],
+            **fields,
+        }
+
+    def assertStock(self, product, quantity):
+        self.assertEqual(Product.objects.get(pk=product.pk).stock_quantity, quantity)
+
+    def test_take_stock_takes_nothing_when_one_product_falls_short(self):
+        short = Product.take_stock({self.product.pk: 2, self.scarce.pk: 6})
+
+        self.assertEqual(short, [self.scarce.pk])
+        self.assertStock(self.product, 100)
+        self.assertStock(self.scarce, 5)
+
+    def test_place_rolls_back_an_order_short_of_stock(self):
+        lines = [
+            Sale(product=self.product, quantity=2, unit_price=Decimal("10.00")),
+            Sale(product=self.scarce, quantity=3, unit_price=Decimal("10.00")),
+            Sale(product=self.scarce, quantity=3, unit_price=Decimal("10.00")),
+        ]
+
+        # Duplicate lines are summed: 6 muffins wanted, 5 in stock
+        with self.assertRaises(InsufficientStock) as raised:
+            Order.place(Order(payment_method=self.payment_method), lines)
+
+        self.assertEqual(raised.exception.product, self.scarce)
+        self.assertEqual(raised.exception.quantity, 6)
+        self.assertStock(self.product, 100)
+        self.assertStock(self.scarce, 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Sale.objects.exists())
+
+    def test_duplicate_product_lines_are_summed(self):
+        response = self.request(
+            "POST",
+            "order-list",
+            data=self.order_data((self.scarce, 3), (self.scarce, 3)),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertStock(self.scarce, 5)
+
+        response = self.request(
+            "POST",
+            "order-list",
+            data=self.order_data((self.scarce, 2), (self.product, 1), (self.scarce, 3)),
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()["lines"]), 3)
+        self.assertStock(self.scarce, 0)
+        self.assertStock(self.product, 99)
+
+    def test_partial_shortfall_records_nothing(self):
+        response = self.request(
+            "POST",
+            "order-list",
+            data=self.order_data((self.product, 2), (self.scarce, 6)),
+        )
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["lines"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("error", errors[1])
+        self.assertStock(self.product, 100)
+        self.assertFalse(Order.objects.exists())
+
+    def test_replaying_a_client_key_returns_the_recorded_order(self):
+        data = self.order_data((self.product, 2), client_key="till-1-order-1")
+
+        first = self.request("POST", "order-list", data=data)
+        second = self.request("POST", "order-list", data=data)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["id"], first.json()["id"])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertStock(self.product, 98)
+
+    def test_empty_or_malformed_lines_are_rejected(self):
+        for lines in (
+            [],
+            "lines",
+            [None],
+            [{"quantity": 1, "unit_price": "10.00"}],
+            [{"product": 999999, "quantity": 1, "unit_price": "10.00"}],
+            [{"product": "x", "quantity": 1, "unit_price": "10.00"}],
+            [{"product": self.product.pk, "quantity": -1, "unit_price": "10.00"}],
+            [{"product": self.product.pk, "quantity": 0, "unit_price": "10.00"}],
+        ):
+            with self.subTest(lines=lines):
+                response = self.request(
+                    "POST",
+                    "order-list",
+                    data={"payment_method": self.payment_method.pk, "lines": lines},
+                )
+                self.assertEqual(response.status_code, 400)
+
+        response = self.request(
+            "POST", "order-list", data={"payment_method": self.payment_method.pk}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.assertStock(self.product, 100)
+
+
+class BatchSaleTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.client.force_login(self.user)
+
+    def test_bulk_flags_a_client_key_repeated_in_the_batch(self):
+        response = self.request(
+            "POST",
+            "sale-bulk",
+            data=[
+                self.sale_data(client_key="till-1"),
+                self.sale_data(client_key="till-1"),
+            ],
+        )
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("client_key", errors[1])
+        self.assertFalse(Sale.objects.exists())
+
+    def test_sync_reports_an_outcome_per_sale(self):
+        self.request("POST", "sale-list", data=self.sale_data(client_key="till-1-0"))
+
+        response = self.request(
+            "POST",
+            "sale-sync",
+            data=[
+                self.sale_data(client_key="till-1-1", quantity=2),
+                self.sale_data(client_key="till-1-0"),
+                self.sale_data(client_key="till-1-2", quantity=500),
+                self.sale_data(),
+                self.sale_data(client_key="till-1-3", quantity=-1),
+            ],
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["created"], 1)
+        results = body["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["created", "duplicate", "rejected", "rejected", "rejected"],
+        )
+        self.assertIn("error", results[2]["errors"])
+        self.assertIn("client_key", results[3]["errors"])
+        self.assertIn("quantity", results[4]["errors"])
+        self.assertEqual(Sale.objects.count(), 2)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 97)
+
+    def test_sync_plans_repeats_and_stock_across_the_batch(self):
+        batch = [
+            self.sale_data(client_key="till-1-1", quantity=60),
+            self.sale_data(client_key="till-1-1", quantity=60),
+            self.sale_data(client_key="till-1-2", quantity=60),
+        ]
+
+        response = self.request("POST", "sale-sync", data=batch)
+
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            ["created", "duplicate", "rejected"],
+        )
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 40)
+
+        # Retrying the batch creates nothing more
+        response = self.request("POST", "sale-sync", data=batch[:2])
+
+        self.assertEqual(response.json()["created"], 0)
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            ["duplicate", "duplicate"],
+        )
+        self.assertEqual(Sale.objects.count(), 1)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 40)
+
+    def test_an_integrity_error_without_a_client_key_is_not_a_retry(self):
+        self.request("POST", "sale-list", data=self.sale_data())
+
+        with mock.patch.object(
+            SaleSerializer, "save", side_effect=IntegrityError("NOT NULL")
+        ):
+            response = self.request("POST", "sale-list", data=self.sale_data())
+        self.assertEqual(response.status_code, 500)
+
+        with mock.patch.object(Order, "place", side_effect=IntegrityError("NOT NULL")):
+            response = self.request(
+                "POST",
+                "order-list",
+                data={
+                    "payment_method": self.payment_method.pk,
+                    "lines": [
+                        {
+                            "product": self.product.pk,
+                            "quantity": 1,
+                            "unit_price": "20.00",
+                        }
+                    ],
+                },
+            )
+        self.assertEqual(response.status_code, 500)
+
+
+class ExportStreamingTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.client.force_login(self.user)
+        for quantity in (1, 2, 3):
+            Sale(
+                product=self.product,
+                payment_method=self.payment_method,
+                quantity=quantity,
+                unit_price=Decimal("20.00"),
+            ).save()
+
+    async def test_export_streams_under_asgi(self):
+        session = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/sales/export/",
+            "raw_path": b"/api/sales/export/",
+            "query_string": f"from={business_today()}&format=csv".encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"cookie", f"{settings.SESSION_COOKIE_NAME}={session}".encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({"type": "http.request"})
+
+        start = await communicator.receive_output()
+        self.assertEqual(start["status"], 200)
+        body = b""
+        while True:
+            message = await communicator.receive_output()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        lines = body.decode().splitlines()
+        self.assertEqual(lines[0].split(",")[0], "id")
+        self.assertEqual(len(lines), 4)
@@ -0,0 +1,50 @@
+import time
+from contextvars import ContextVar
+
+from rest_framework import serializers
+
+# Timing of the request being handled, if it was sampled for Server-Timing
+current_timing = ContextVar("current_timing", default=None)
+
+
+class RequestTiming:
+    """Where one request's time went, in seconds"""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook timing every query"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+
+class TimedSerializerMixin:
+    """Add the time spent building .data to the sampled request's timing.
+
+    Only top-level .data is timed (nested serializers call
+    to_representation), so nothing is counted twice. Pair with
+    TimedListSerializer as Meta.list_serializer_class to time many=True.
+    """
+
+    @property
+    def data(self):
+        timing = current_timing.get()
+        if timing is None:
+            return super().data
+
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            timing.serializer_time += time.perf_counter() - started
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
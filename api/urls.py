@@ -5,7 +5,12 @@ from .views import (
     PaymentMethodViewSet,
     CategoryViewSet,
     ProductViewSet,
+    OrderViewSet,
+    StockAlertViewSet,
     dashboard_data,
+    dashboard_data_async,
+    register_device,
+    sales_timeseries,
     test_api,
     today_sales_count,
 )
@@ -15,10 +20,15 @@ router.register(r"sales", SaleViewSet)
 router.register(r"payment-methods", PaymentMethodViewSet)
 router.register(r"categories", CategoryViewSet)
 router.register(r"products", ProductViewSet)
+router.register(r"orders", OrderViewSet)
+router.register(r"stock-alerts", StockAlertViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
     path("dashboard-data/", dashboard_data, name="dashboard-data"),
+    path("dashboard-data/async/", dashboard_data_async, name="dashboard-data-async"),
+    path("reports/timeseries/", sales_timeseries, name="reports-timeseries"),
+    path("devices/register/", register_device, name="device-register"),
     path("test/", test_api, name="test-api"),
     path("today-sales-count/", today_sales_count, name="today-sales-count"),
 ]
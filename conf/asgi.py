@@ -2,6 +2,9 @@
 ASGI config for conf project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests for the live sales feed are streamed by api.events; everything else
+goes to Django, through a handler that reads streaming responses (the sales
+export) off the event loop.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -9,8 +12,21 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+
+from api.handlers import StreamingASGIHandler
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "conf.settings")
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+django_application = StreamingASGIHandler()
+
+# Imported once Django is set up
+from api.events import EVENTS_PATH, event_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == EVENTS_PATH:
+        await event_stream(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
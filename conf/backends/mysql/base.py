@@ -0,0 +1,26 @@
+"""MySQL backend whose persistent connections are health checked.
+
+With CONN_MAX_AGE, Django 3.2 only checks a reused connection after a
+query on it failed, so the first query of a request can hit a connection
+the server has since dropped (wait_timeout, a restart or a failover). This
+pings it at the start and end of each request instead and lets Django
+reconnect if it is gone.
+"""
+
+from django.db.backends.mysql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def is_usable(self):
+        try:
+            # PyMySQL reconnects by default, which would hide a dropped
+            # connection mid-transaction
+            self.connection.ping(reconnect=False)
+        except base.Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if self.connection is not None and not self.is_usable():
+            self.close()
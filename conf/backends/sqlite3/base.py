@@ -0,0 +1,40 @@
+"""SQLite backend tuned for several gunicorn workers writing at once.
+
+Connections use WAL journaling, so reads never wait for a writer, with
+synchronous=NORMAL, which only syncs at checkpoints. Transactions begin
+IMMEDIATE: a deferred transaction that reads before it writes can't wait
+for the write lock when another worker holds it and fails with "database
+is locked" straight away, whereas BEGIN IMMEDIATE waits up to the busy
+timeout (OPTIONS["timeout"]) and is retried a few times after that.
+"""
+
+import random
+import time
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+# Attempts at starting a transaction while other workers hold the lock
+BEGIN_ATTEMPTS = 3
+
+# Upper bound of the random pause before another attempt, in seconds
+BEGIN_RETRY_DELAY = 0.05
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        if not self.is_in_memory_db():
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        for attempt in range(1, BEGIN_ATTEMPTS + 1):
+            try:
+                self.cursor().execute("BEGIN IMMEDIATE")
+                return
+            except OperationalError as e:
+                if "locked" not in str(e) or attempt == BEGIN_ATTEMPTS:
+                    raise
+            time.sleep(random.uniform(0, BEGIN_RETRY_DELAY))
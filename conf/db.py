@@ -0,0 +1,75 @@
+"""DATABASES["default"] for each DB_PROFILE.
+
+- sqlite: SQLite tuned for concurrent workers (conf/backends/sqlite3)
+  with persistent connections. The default.
+- sqlite-plain: Django's stock SQLite setup, for comparing against.
+- mysql: MySQL through PyMySQL with persistent, health checked
+  connections (conf/backends/mysql), configured by the DB_* variables.
+
+DB_NAME names the SQLite file too (default db.sqlite3 in the project).
+DB_CONN_MAX_AGE sets how many seconds a connection is kept for reuse.
+
+A read replica is configured by DB_REPLICA_NAME for SQLite (a copy of the
+database file, see the sync_replica command) or DB_REPLICA_HOST and
+DB_REPLICA_PORT for MySQL.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DB_PROFILES = ["sqlite", "sqlite-plain", "mysql"]
+
+
+def get_database(profile, base_dir):
+    conn_max_age = int(os.environ.get("DB_CONN_MAX_AGE", "60"))
+    # For SQLite, DB_NAME is the database file
+    sqlite_name = os.environ.get("DB_NAME") or base_dir / "db.sqlite3"
+
+    if profile == "sqlite":
+        return {
+            "ENGINE": "conf.backends.sqlite3",
+            "NAME": sqlite_name,
+            "CONN_MAX_AGE": conn_max_age,
+            # Seconds a worker waits for another's write lock
+            "OPTIONS": {"timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", "20"))},
+        }
+    if profile == "sqlite-plain":
+        return {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": sqlite_name,
+        }
+    if profile == "mysql":
+        return {
+            "ENGINE": "conf.backends.mysql",
+            "NAME": os.environ.get("DB_NAME", "coffee_shop"),
+            "USER": os.environ.get("DB_USER", ""),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", "127.0.0.1"),
+            "PORT": os.environ.get("DB_PORT", "3306"),
+            "CONN_MAX_AGE": conn_max_age,
+            "OPTIONS": {
+                "charset": "utf8mb4",
+                "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
+            },
+        }
+    raise ImproperlyConfigured(
+        f"Unknown DB_PROFILE {profile!r}, expected one of {', '.join(DB_PROFILES)}"
+    )
+
+
+def get_replica_database(profile, base_dir):
+    """DATABASES["replica"] for the profile, or None if none is configured"""
+    database = get_database(profile, base_dir)
+    if profile == "mysql":
+        if not os.environ.get("DB_REPLICA_HOST"):
+            return None
+        database["HOST"] = os.environ["DB_REPLICA_HOST"]
+        database["PORT"] = os.environ.get("DB_REPLICA_PORT", database["PORT"])
+    else:
+        if not os.environ.get("DB_REPLICA_NAME"):
+            return None
+        database["NAME"] = os.environ["DB_REPLICA_NAME"]
+    # Tests read their writes through the primary
+    database["TEST"] = {"MIRROR": "default"}
+    return database
@@ -0,0 +1,68 @@
+"""Logging helpers used by the LOGGING setting.
+
+Request threads only put records on a queue; a background thread formats
+them as JSON and writes them out, so slow log I/O never holds up a request.
+"""
+
+import atexit
+import json
+import logging
+import random
+from datetime import datetime, timezone
+from logging.config import ConvertingList
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+# Attributes every LogRecord has; anything else was passed with extra=
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of a chatty logger's records below WARNING"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class QueueListenerHandler(QueueHandler):
+    """Queue records for a background thread that passes them to handlers.
+
+    Records are queued as they are, so their messages are only formatted
+    by the background thread, and only if a handler keeps them; log
+    arguments shouldn't be mutated after the call.
+    """
+
+    def __init__(self, handlers):
+        super().__init__(SimpleQueue())
+        if isinstance(handlers, ConvertingList):
+            # Resolve "cfg://handlers.<name>" references from dictConfig
+            handlers = [handlers[index] for index in range(len(handlers))]
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        # Flush what's queued when the process exits
+        atexit.register(self.listener.stop)
+
+    def prepare(self, record):
+        return record
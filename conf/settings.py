@@ -64,6 +64,10 @@ AUTHENTICATION_BACKENDS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.MetricsMiddleware",
+    "api.middleware.ServerTimingMiddleware",
+    "api.middleware.QueryBudgetMiddleware",
+    "api.middleware.ReplicaPinMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -98,28 +102,26 @@ WSGI_APPLICATION = "conf.wsgi.application"
 
 import pymysql
 
+from .db import get_database, get_replica_database
+
 pymysql.install_as_MySQLdb()
 
-# DATABASES = {
-#     "default": {
-#         "ENGINE": "django.db.backends.mysql",
-#         "NAME": "u183730229_coffee_shop",
-#         "USER": "u183730229_root",
-#         "PASSWORD": "NtZYc@cuCz6@",
-#         "HOST": "127.0.0.1",  # Use IP instead of localhost
-#         "PORT": "3306",
-#         "OPTIONS": {
-#             "charset": "utf8mb4",
-#             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
-#         },
-#     }
-# }
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',  # The database file path
-    }
-}
+# Picked by DB_PROFILE, see conf/db.py
+DB_PROFILE = os.environ.get("DB_PROFILE", "sqlite")
+
+DATABASES = {"default": get_database(DB_PROFILE, BASE_DIR)}
+
+# Optional read replica for report reads (dashboard/routers.py), e.g. a copy
+# of the SQLite file refreshed with the sync_replica command
+REPLICA_DATABASE = get_replica_database(DB_PROFILE, BASE_DIR)
+if REPLICA_DATABASE:
+    DATABASES["replica"] = REPLICA_DATABASE
+
+DATABASE_ROUTERS = ["dashboard.routers.ReplicaRouter"]
+
+# Seconds a client's reads stay on the primary after it wrote, covering
+# the replica's lag
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", "10"))
 
 
 # Password validation
@@ -178,6 +180,12 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # REST Framework settings
 REST_FRAMEWORK = {
+    # POS devices send their token; the browser dashboard uses its session
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "api.authentication.DeviceTokenAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
@@ -188,6 +196,79 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 20,
 }
 
+# Session users and device tokens are cached for AUTH_CACHE_SECONDS in
+# each process (dashboard/auth_backend.py), so authenticated requests don't
+# query for them. Saving or deleting a user drops it from the cache of the
+# process that did it; other processes see the change within the timeout.
+# 0 turns the caching off. Sessions stay in the database, so logging out
+# takes effect in every process at once.
+AUTH_CACHE_SECONDS = int(os.environ.get("AUTH_CACHE_SECONDS", "60"))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "auth": {
+        "BACKEND": "dashboard.cache.BoundedLocMemCache",
+        "LOCATION": "auth",
+        "TIMEOUT": AUTH_CACHE_SECONDS,
+    },
+}
+
+# Fail /api/ requests that exceed their query budget (api/query_budget.py).
+# Debug aid; keep off in production
+QUERY_BUDGET_ENFORCED = os.environ.get("QUERY_BUDGET_ENFORCED", "False") == "True"
+
+# Fraction of /api/ requests that get a Server-Timing header and a timing log
+# line (api/middleware.py); 0 turns it off
+SERVER_TIMING_SAMPLE_RATE = float(os.environ.get("SERVER_TIMING_SAMPLE_RATE", "1.0"))
+
+# Bearer token Prometheus must send to read /metrics; empty leaves it open
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Logging: records are queued by the request thread and written as JSON
+# lines by a background thread (conf/log.py). The chatty loggers keep only a
+# sample of their INFO records; warnings and errors are always kept.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_SAMPLE_RATE_VIEWS = float(os.environ.get("LOG_SAMPLE_RATE_VIEWS", "1.0"))
+LOG_SAMPLE_RATE_TIMING = float(os.environ.get("LOG_SAMPLE_RATE_TIMING", "1.0"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "conf.log.JsonFormatter"},
+    },
+    "filters": {
+        "sample_views": {
+            "()": "conf.log.SamplingFilter",
+            "rate": LOG_SAMPLE_RATE_VIEWS,
+        },
+        "sample_timing": {
+            "()": "conf.log.SamplingFilter",
+            "rate": LOG_SAMPLE_RATE_TIMING,
+        },
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "formatter": "json",
+        },
+        "queue": {
+            "()": "conf.log.QueueListenerHandler",
+            "handlers": ["cfg://handlers.console"],
+        },
+    },
+    "root": {"handlers": ["queue"], "level": "WARNING"},
+    "loggers": {
+        "django": {"handlers": ["queue"], "level": LOG_LEVEL, "propagate": False},
+        "api": {"handlers": ["queue"], "level": LOG_LEVEL, "propagate": False},
+        # Logger filters only see records logged on that logger itself
+        "api.views": {"filters": ["sample_views"]},
+        "api.middleware": {"filters": ["sample_timing"]},
+    },
+}
+
 # CORS settings for PWA
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 CORS_ALLOW_CREDENTIALS = True
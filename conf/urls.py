@@ -20,6 +20,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
+from api.metrics import metrics_view
 from dashboard.views import custom_login
 
 urlpatterns = [
@@ -28,6 +29,7 @@ urlpatterns = [
     path("api/", include("api.urls")),
     path("login/", custom_login, name="login"),
     path("logout/", auth_views.LogoutView.as_view(), name="logout"),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 # Serve static files during development
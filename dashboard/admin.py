@@ -1,6 +1,33 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
-from .models import Sale, PaymentMethod, Category, User, Product
+from django.db import transaction
+from .models import (
+    Sale,
+    PaymentMethod,
+    Category,
+    User,
+    Product,
+    DailySalesRollup,
+    ProductSalesCounter,
+    StockAlert,
+    CatalogVersion,
+    Device,
+    Order,
+    record_sale_totals,
+)
+from .routers import replica_reads
+
+
+class ReplicaChangelistMixin:
+    """Read the changelist from the replica, if there is one"""
+
+    def changelist_view(self, request, extra_context=None):
+        with replica_reads():
+            response = super().changelist_view(request, extra_context)
+            # The rows are only read when the template renders
+            if hasattr(response, "render"):
+                response.render()
+            return response
 
 
 @admin.register(User)
@@ -76,6 +103,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = [
         "category",
         "product_type",
+        "stock_status",
         "is_quick_action",
         "is_active",
         "created_at",
@@ -138,14 +166,45 @@ class ProductAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related("category")
 
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        if db_field.name == "stock_quantity":
+            # Posts back the stock the form showed, so an edit is applied as
+            # a change to whatever sales left meanwhile
+            kwargs["show_hidden_initial"] = True
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        # Product.save never writes the stock of an existing product
+        super().save_model(request, obj, form, change)
+        if not change or "stock_quantity" not in form.changed_data:
+            return
+
+        field = form.fields["stock_quantity"]
+        shown = field.to_python(
+            form.data.get(form.add_initial_prefix("stock_quantity"))
+        )
+        if shown is None:
+            return
+        stock_change = form.cleaned_data["stock_quantity"] - shown
+        if not Product.change_stock(obj.pk, stock_change):
+            obj.refresh_from_db(fields=["stock_quantity"])
+            self.message_user(
+                request,
+                f"The stock of {obj.name} was not changed: only "
+                f"{obj.stock_quantity} left.",
+                messages.ERROR,
+            )
+
     @admin.action(description="Mark selected products as Quick Actions")
     def mark_as_quick_action(self, request, queryset):
         updated = queryset.update(is_quick_action=True)
+        CatalogVersion.bump()
         self.message_user(request, f"{updated} products marked as Quick Actions.")
 
     @admin.action(description="Remove selected products from Quick Actions")
     def remove_from_quick_action(self, request, queryset):
         updated = queryset.update(is_quick_action=False)
+        CatalogVersion.bump()
         self.message_user(request, f"{updated} products removed from Quick Actions.")
 
     def get_actions(self, request):
@@ -156,19 +215,26 @@ class ProductAdmin(admin.ModelAdmin):
 
 
 @admin.register(Sale)
-class SaleAdmin(admin.ModelAdmin):
+class SaleAdmin(ReplicaChangelistMixin, admin.ModelAdmin):
+    # The names are the sale's own snapshots, so listing needs no joins
     list_display = [
-        "product",
+        "product_name",
         "quantity",
         "unit_price",
         "total_amount",
-        "payment_method",
+        "payment_method_name",
         "customer_name",
         "created_at",
     ]
     list_filter = ["product__category", "payment_method", "created_at"]
-    search_fields = ["product__name", "customer_name", "customer_phone"]
-    readonly_fields = ["total_amount", "created_at"]
+    search_fields = ["product_name", "customer_name", "customer_phone"]
+    readonly_fields = [
+        "total_amount",
+        "product_name",
+        "category_name",
+        "payment_method_name",
+        "created_at",
+    ]
     ordering = ["-created_at"]
 
     fieldsets = (
@@ -191,11 +257,164 @@ class SaleAdmin(admin.ModelAdmin):
                 "classes": ("collapse",),
             },
         ),
-        ("System Information", {"fields": ("created_at",), "classes": ("collapse",)}),
+        (
+            "System Information",
+            {
+                "fields": (
+                    "product_name",
+                    "category_name",
+                    "payment_method_name",
+                    "created_at",
+                ),
+                "classes": ("collapse",),
+            },
+        ),
     )
 
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes bypass Sale.delete(), so take them out of the rollup
+        # and product counters here
+        with transaction.atomic():
+            record_sale_totals(queryset, sign=-1)
+            queryset.delete()
+
+
+class OrderLineInline(admin.TabularInline):
+    model = Sale
+    fields = ["product", "quantity", "unit_price", "total_amount"]
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "total_amount",
+        "payment_method",
+        "customer_name",
+        "created_at",
+    ]
+    list_filter = ["payment_method", "created_at"]
+    search_fields = ["customer_name", "customer_phone"]
+    readonly_fields = ["payment_method", "total_amount", "client_key", "created_at"]
+    ordering = ["-created_at"]
+    inlines = [OrderLineInline]
+
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related("product", "payment_method")
+        return super().get_queryset(request).select_related("payment_method")
+
+    def has_add_permission(self, request):
+        # Orders are placed through /api/orders/, which takes their stock
+        return False
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(ReplicaChangelistMixin, admin.ModelAdmin):
+    list_display = [
+        "business_date",
+        "category",
+        "payment_method",
+        "product",
+        "sale_count",
+        "quantity",
+        "total_amount",
+    ]
+    list_filter = ["business_date", "category", "payment_method"]
+    search_fields = ["product__name"]
+    ordering = ["-business_date"]
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("category", "payment_method", "product")
+        )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ProductSalesCounter)
+class ProductSalesCounterAdmin(ReplicaChangelistMixin, admin.ModelAdmin):
+    list_display = [
+        "period",
+        "period_start",
+        "product",
+        "sale_count",
+        "quantity",
+        "total_amount",
+    ]
+    list_filter = ["period", "period_start"]
+    search_fields = ["product__name"]
+    ordering = ["-period_start", "-total_amount"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("product__category")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockAlert)
+class StockAlertAdmin(admin.ModelAdmin):
+    list_display = [
+        "created_at",
+        "product",
+        "previous_status",
+        "status",
+        "stock_quantity",
+        "min_stock_level",
+    ]
+    list_filter = ["status", "created_at"]
+    search_fields = ["product__name"]
+    ordering = ["-id"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("product__category")
+
+    def has_add_permission(self, request):
+        # Alerts are recorded as stock changes
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Device)
+class DeviceAdmin(admin.ModelAdmin):
+    list_display = ["name", "user", "created_at", "revoked_at"]
+    list_filter = ["revoked_at"]
+    search_fields = ["name", "user__phone"]
+    readonly_fields = ["user", "created_at", "revoked_at"]
+    ordering = ["-created_at"]
+    actions = ["revoke_devices"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("user")
+
+    def has_add_permission(self, request):
+        # Devices get their token from /api/devices/register/
+        return False
+
+    @admin.action(description="Revoke selected devices")
+    def revoke_devices(self, request, queryset):
+        # One save per device, so each one's cached token is dropped
+        revoked = 0
+        for device in queryset.filter(revoked_at__isnull=True):
+            device.revoke()
+            revoked += 1
+        self.message_user(request, f"{revoked} devices revoked.")
 
 
 # Customize admin site
@@ -1,9 +1,31 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
 
 User = get_user_model()
 
+# Per-process cache of session users and device tokens (see CACHES)
+AUTH_CACHE_ALIAS = "auth"
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def forget_user(user_id):
+    """Drop a user from this process's cache, e.g. after it changed"""
+    caches[AUTH_CACHE_ALIAS].delete(user_cache_key(user_id))
+
+
+def device_cache_key(token_hash):
+    return f"auth-device:{token_hash}"
+
+
+def forget_device(token_hash):
+    """Drop a device token from this process's cache, e.g. once revoked"""
+    caches[AUTH_CACHE_ALIAS].delete(device_cache_key(token_hash))
+
 
 class PhoneBackend(ModelBackend):
     def authenticate(self, request, phone=None, password=None, **kwargs):
@@ -25,7 +47,21 @@ class PhoneBackend(ModelBackend):
         return None
 
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+        """The session's user, from the auth cache when it is there.
+
+        Entries are dropped when the user is saved or deleted, so
+        deactivation and password changes apply at once in the process that
+        made them and within the cache TIMEOUT in the others.
+        """
+        cache = caches[AUTH_CACHE_ALIAS]
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = User.objects.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(key, user)
+
+        # Inactive users can't log in, so their sessions don't count either
+        return user if self.user_can_authenticate(user) else None
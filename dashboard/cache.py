@@ -0,0 +1,16 @@
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class BoundedLocMemCache(LocMemCache):
+    """Local-memory cache that keeps no entry longer than its TIMEOUT.
+
+    Every process has its own copy, so an entry another process changes or
+    deletes can be served stale; capping every entry, including ones set
+    with a longer explicit timeout, bounds for how long.
+    """
+
+    def get_backend_timeout(self, timeout=DEFAULT_TIMEOUT):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            timeout = self.default_timeout
+        return super().get_backend_timeout(min(timeout, self.default_timeout))
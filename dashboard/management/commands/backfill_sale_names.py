@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from dashboard.models import PaymentMethod, Product, Sale
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in the product, category and payment method names of sales "
+        "recorded before sales kept their own copies. Uses the current "
+        "names, the best record left of the old ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Sales updated per UPDATE statement",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        product = Product.objects.filter(pk=OuterRef("product_id"))
+        names = {
+            "product_name": Subquery(product.values("name")[:1]),
+            "category_name": Subquery(product.values("category__name")[:1]),
+            "payment_method_name": Subquery(
+                PaymentMethod.objects.filter(pk=OuterRef("payment_method_id")).values(
+                    "name"
+                )[:1]
+            ),
+        }
+        missing = Sale.objects.filter(product_name="").order_by("id")
+
+        updated = 0
+        last_id = 0
+        while True:
+            ids = list(
+                missing.filter(id__gt=last_id).values_list("id", flat=True)[
+                    : options["batch_size"]
+                ]
+            )
+            if not ids:
+                break
+            # Short transactions, so checkouts aren't held up behind a backfill
+            with transaction.atomic():
+                updated += Sale.objects.filter(pk__in=ids).update(**names)
+            last_id = ids[-1]
+            self.stdout.write(f"Backfilled {updated} sales")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled names of {updated} sales"))
@@ -0,0 +1,138 @@
+import json
+import multiprocessing
+import platform
+import random
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from api.views import SaleViewSet
+from dashboard.models import PaymentMethod, Product, User
+
+
+def run_checkouts(worker, checkouts, products, payment_methods):
+    """Record sales through the sale API view the way one gunicorn worker
+    would, returning (start, end, [(status, ms, locked), ...])"""
+    view = SaleViewSet.as_view({"post": "create"})
+    # Never saved: the view only needs an authenticated user
+    user = User(phone="benchmark")
+    factory = APIRequestFactory()
+    rng = random.Random(worker)
+
+    results = []
+    started = time.time()
+    for _ in range(checkouts):
+        product_id, price = rng.choice(products)
+        request = factory.post(
+            "/api/sales/",
+            {
+                "product": product_id,
+                "payment_method": rng.choice(payment_methods),
+                "quantity": 1,
+                "unit_price": price,
+            },
+            format="json",
+        )
+        force_authenticate(request, user=user)
+        # What Django does around every request, so CONN_MAX_AGE applies
+        close_old_connections()
+        request_started = time.perf_counter()
+        response = view(request)
+        elapsed = time.perf_counter() - request_started
+        close_old_connections()
+        locked = "locked" in str(response.data.get("error", ""))
+        results.append((response.status_code, elapsed * 1000, locked))
+    return started, time.time(), results
+
+
+class Command(BaseCommand):
+    help = (
+        "Time concurrent checkouts against the configured database (pick one "
+        "with DB_PROFILE) and print JSON results. Records real sales: only "
+        "use it on a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Processes checking out at once, like gunicorn workers",
+        )
+        parser.add_argument(
+            "--checkouts", type=int, default=200, help="Sales recorded per worker"
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["checkouts"] < 1:
+            raise CommandError("--workers and --checkouts must be positive")
+
+        # Non-stockable products, so running out of stock doesn't end the run
+        products = [
+            (product_id, str(price))
+            for product_id, price in Product.objects.filter(
+                is_active=True, product_type="non_stockable"
+            ).values_list("id", "price")
+        ]
+        payment_methods = list(
+            PaymentMethod.objects.filter(is_active=True).values_list("id", flat=True)
+        )
+        if not products or not payment_methods:
+            raise CommandError(
+                "Needs active non-stockable products and payment methods; "
+                "run seed_data first"
+            )
+
+        self.stderr.write(
+            f"Running {options['workers']} workers x {options['checkouts']} "
+            f"checkouts on the {settings.DB_PROFILE} profile..."
+        )
+        # Forked workers must open connections of their own
+        connections.close_all()
+        with multiprocessing.get_context("fork").Pool(options["workers"]) as pool:
+            runs = pool.starmap(
+                run_checkouts,
+                [
+                    (worker, options["checkouts"], products, payment_methods)
+                    for worker in range(options["workers"])
+                ],
+            )
+
+        results = [result for _, _, worker_results in runs for result in worker_results]
+        elapsed = max(end for _, end, _ in runs) - min(start for start, _, _ in runs)
+        created = [ms for status, ms, _ in results if status == 201]
+        durations = sorted(ms for _, ms, _ in results)
+        report = json.dumps(
+            {
+                "generated_at": timezone.now().isoformat(),
+                "profile": settings.DB_PROFILE,
+                "database": connection.vendor,
+                "engine": settings.DATABASES["default"]["ENGINE"],
+                "conn_max_age": settings.DATABASES["default"].get("CONN_MAX_AGE", 0),
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "workers": options["workers"],
+                "checkouts": len(results),
+                "created": len(created),
+                "failed": len(results) - len(created),
+                "locked": sum(1 for _, _, locked in results if locked),
+                "seconds": round(elapsed, 2),
+                "checkouts_per_second": round(len(created) / elapsed, 1),
+                "median_ms": round(statistics.median(durations), 2),
+                "p95_ms": round(durations[int(len(durations) * 0.95) - 1], 2),
+                "max_ms": round(durations[-1], 2),
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report + "\n")
+            self.stderr.write(f"Wrote results to {options['output']}")
+        else:
+            self.stdout.write(report)
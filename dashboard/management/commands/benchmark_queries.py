@@ -0,0 +1,135 @@
+import json
+import platform
+import statistics
+import time
+from datetime import timedelta
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from api.views import SaleViewSet, dashboard_data, sales_timeseries, today_sales_count
+from dashboard.models import Sale, User
+from dashboard.utils import business_today
+
+# Endpoints timed, with the view and path each request is sent to. {year_ago}
+# in a path is replaced with the business date a year before today.
+BENCHMARKS = {
+    "dashboard_data": (dashboard_data, "/api/dashboard-data/"),
+    "today_sales_count": (today_sales_count, "/api/today-sales-count/"),
+    "sales_today": (SaleViewSet.as_view({"get": "today"}), "/api/sales/today/"),
+    "sales_monthly": (
+        SaleViewSet.as_view({"get": "monthly"}),
+        "/api/sales/monthly/",
+    ),
+    "sales_recent": (SaleViewSet.as_view({"get": "recent"}), "/api/sales/recent/"),
+    "sales_timeseries_year": (
+        sales_timeseries,
+        "/api/reports/timeseries/?bucket=day&group_by=category&from={year_ago}",
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the API endpoints behind the dashboard and sales pages and "
+        "print JSON results. With --sizes, first tops the sales up to each "
+        "size with generate_load_data; only use that on a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Timed runs per endpoint"
+        )
+        parser.add_argument(
+            "--sizes",
+            help="Comma-separated sale counts to benchmark at, e.g. 10000,100000",
+        )
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=3,
+            help="Months to spread generated sales over (with --sizes)",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be positive")
+        try:
+            sizes = sorted(
+                int(size) for size in (options["sizes"] or "").split(",") if size
+            )
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        results = []
+        if not sizes:
+            results.append(self.run_benchmarks(options["repeat"]))
+        for size in sizes:
+            missing = size - Sale.objects.count()
+            if missing > 0:
+                call_command(
+                    "generate_load_data",
+                    sales=missing,
+                    months=options["months"],
+                    stdout=self.stderr,
+                )
+            results.append(self.run_benchmarks(options["repeat"]))
+
+        report = json.dumps(
+            {
+                "generated_at": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "repeat": options["repeat"],
+                "results": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report + "\n")
+            self.stderr.write(f"Wrote results to {options['output']}")
+        else:
+            self.stdout.write(report)
+
+    def run_benchmarks(self, repeat):
+        sales = Sale.objects.count()
+        self.stderr.write(f"Benchmarking with {sales} sales...")
+        # Never saved: the views only need an authenticated user
+        user = User(phone="benchmark")
+        factory = APIRequestFactory()
+        year_ago = business_today() - timedelta(days=364)
+
+        timings = {}
+        for name, (view, path) in BENCHMARKS.items():
+            durations = []
+            # The first, untimed run warms the database cache
+            for run in range(repeat + 1):
+                request = factory.get(path.format(year_ago=year_ago))
+                force_authenticate(request, user=user)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = view(request)
+                    response.render()
+                    elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    raise CommandError(
+                        f"{name} returned {response.status_code}: {response.data}"
+                    )
+                if run:
+                    durations.append(elapsed * 1000)
+
+            timings[name] = {
+                "min_ms": round(min(durations), 2),
+                "median_ms": round(statistics.median(durations), 2),
+                "max_ms": round(max(durations), 2),
+                "queries": len(queries),
+                "response_bytes": len(response.content),
+            }
+        return {"sales": sales, "endpoints": timings}
@@ -0,0 +1,158 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from dashboard.models import PaymentMethod, Product, Sale
+from dashboard.utils import BUSINESS_TIMEZONE, business_today
+
+# Relative number of sales in each hour of the business day (0-23): a
+# breakfast rush, a lunch peak and an after-work bump
+HOURLY_WEIGHTS = [
+    0, 0, 0, 0, 0, 0, 1, 4,
+    9, 10, 7, 6, 8, 9, 6, 4,
+    5, 7, 8, 6, 4, 2, 1, 0,
+]  # fmt: skip
+
+# Relative number of sales per weekday, Monday first (Friday and Saturday
+# are the weekend)
+WEEKDAY_WEIGHTS = [10, 10, 10, 11, 14, 13, 11]
+
+# Relative odds of selling 1, 2, 3... of an item
+QUANTITY_WEIGHTS = [60, 25, 10, 4, 1]
+
+
+@contextmanager
+def explicit_created_at():
+    """Let bulk_create keep the created_at set on each sale instead of
+    auto_now_add stamping it with the current time"""
+    field = Sale._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Add large volumes of realistic synthetic sales for load testing. "
+        "Stock is left untouched; only use on a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sales", type=int, default=100000, help="Number of sales to add"
+        )
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=3,
+            help="Spread the sales over this many months up to today",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Sales per INSERT"
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Random seed, for reproducible data"
+        )
+
+    def handle(self, *args, **options):
+        count = options["sales"]
+        if count < 1 or options["months"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--sales, --months and --batch-size must be positive")
+
+        products = list(
+            Product.objects.filter(is_active=True).select_related("category")
+        )
+        payment_methods = list(PaymentMethod.objects.filter(is_active=True))
+        if not products or not payment_methods:
+            raise CommandError(
+                "No active products or payment methods; run seed_data first"
+            )
+
+        rng = random.Random(options["seed"])
+        last_day = business_today()
+        first_day = last_day - timedelta(days=30 * options["months"] - 1)
+        days = [
+            first_day + timedelta(days=i)
+            for i in range((last_day - first_day).days + 1)
+        ]
+        day_weights = [WEEKDAY_WEIGHTS[day.weekday()] for day in days]
+
+        # A long-tailed product mix: a few best sellers, led by the quick
+        # actions, and many slow movers
+        rng.shuffle(products)
+        products.sort(key=lambda product: not product.is_quick_action)
+        product_weights = [1 / rank for rank in range(1, len(products) + 1)]
+        payment_weights = [1 / rank**2 for rank in range(1, len(payment_methods) + 1)]
+
+        self.stdout.write(f"Generating {count} sales from {first_day} to {last_day}...")
+        created = 0
+        with explicit_created_at():
+            while created < count:
+                size = min(options["batch_size"], count - created)
+                now = timezone.now()
+                sales = [
+                    self.make_sale(
+                        self.pick_time(rng, days, day_weights, now),
+                        rng.choices(products, product_weights)[0],
+                        rng.choices(payment_methods, payment_weights)[0],
+                        rng,
+                    )
+                    for _ in range(size)
+                ]
+                with transaction.atomic():
+                    Sale.objects.bulk_create(sales)
+                created += size
+                self.stdout.write(f"Created {created}/{count} sales")
+
+        call_command(
+            "rebuild_sales_rollup",
+            "--from",
+            first_day.isoformat(),
+            "--to",
+            last_day.isoformat(),
+            stdout=self.stdout,
+        )
+        call_command(
+            "reconcile_product_counters",
+            "--from",
+            first_day.isoformat(),
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Generated {count} sales"))
+
+    def pick_time(self, rng, days, day_weights, now):
+        """Random sale time following the weekday and hourly curves, never
+        later than now"""
+        while True:
+            day = rng.choices(days, day_weights)[0]
+            hour = rng.choices(range(24), HOURLY_WEIGHTS)[0]
+            created_at = BUSINESS_TIMEZONE.localize(
+                datetime.combine(day, time(hour))
+            ) + timedelta(seconds=rng.randrange(3600))
+            if created_at <= now:
+                return created_at
+
+    def make_sale(self, created_at, product, payment_method, rng):
+        quantity = rng.choices(range(1, len(QUANTITY_WEIGHTS) + 1), QUANTITY_WEIGHTS)[0]
+        named = rng.random() < 0.2
+        sale = Sale(
+            product=product,
+            payment_method=payment_method,
+            quantity=quantity,
+            unit_price=product.price,
+            total_amount=product.price * Decimal(quantity),
+            customer_name=f"Customer {rng.randrange(1, 5000)}" if named else "",
+            customer_phone=(
+                f"+8801{rng.randint(100000000, 999999999)}" if named else ""
+            ),
+            created_at=created_at,
+        )
+        sale.capture_names()
+        return sale
@@ -0,0 +1,81 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from dashboard.models import DailySalesRollup, Sale
+from dashboard.utils import BUSINESS_TIMEZONE, business_day_bounds
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollup from raw sales"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            help="First business date to rebuild (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            help="Last business date to rebuild (YYYY-MM-DD)",
+        )
+
+    def handle(self, *args, **options):
+        date_from = self.parse_date(options["date_from"])
+        date_to = self.parse_date(options["date_to"])
+
+        sales = Sale.objects.all()
+        rollups = DailySalesRollup.objects.all()
+        if date_from:
+            sales = sales.filter(created_at__gte=business_day_bounds(date_from)[0])
+            rollups = rollups.filter(business_date__gte=date_from)
+        if date_to:
+            sales = sales.filter(created_at__lt=business_day_bounds(date_to)[1])
+            rollups = rollups.filter(business_date__lte=date_to)
+
+        rows = (
+            sales.annotate(
+                business_date=TruncDate("created_at", tzinfo=BUSINESS_TIMEZONE)
+            )
+            .values("business_date", "category", "payment_method", "product")
+            .annotate(
+                sale_count=Count("id"),
+                total_quantity=Sum("quantity"),
+                total=Sum("total_amount"),
+            )
+            .order_by()
+        )
+
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            created = DailySalesRollup.objects.bulk_create(
+                (
+                    DailySalesRollup(
+                        business_date=row["business_date"],
+                        category_id=row["category"],
+                        payment_method_id=row["payment_method"],
+                        product_id=row["product"],
+                        sale_count=row["sale_count"],
+                        quantity=row["total_quantity"],
+                        total_amount=row["total"],
+                    )
+                    for row in rows.iterator()
+                ),
+                batch_size=1000,
+            )
+
+        self.stdout.write(f"Deleted {deleted} rollup rows")
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {len(created)} daily sales rollup rows")
+        )
+
+    def parse_date(self, value):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
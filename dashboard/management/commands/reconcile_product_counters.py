@@ -0,0 +1,139 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from dashboard.models import ProductSalesCounter, Sale
+from dashboard.utils import BUSINESS_TIMEZONE, business_day_bounds, period_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the product sales counters with the raw sales and repair "
+        "any that drifted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            help="Only check the periods holding this business date (YYYY-MM-DD) "
+            "and later",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the drift without repairing it",
+        )
+
+    def handle(self, *args, **options):
+        date_from = self.parse_date(options["date_from"])
+
+        # Reading and repairing in one transaction keeps sales recorded
+        # meanwhile from being counted twice or lost
+        with transaction.atomic():
+            expected = self.count_sales(date_from)
+            counters = ProductSalesCounter.objects.all()
+            if date_from:
+                # The month holding date_from starts before its week and day
+                counters = counters.filter(
+                    period_start__gte=period_start(date_from, "month")
+                )
+
+            stale = []
+            changed = []
+            for counter in counters.iterator():
+                key = (counter.period, counter.period_start, counter.product_id)
+                if date_from and counter.period_start < period_start(
+                    date_from, counter.period
+                ):
+                    continue
+                totals = expected.pop(key, None)
+                if totals is None:
+                    stale.append(counter.pk)
+                elif totals != (
+                    counter.sale_count,
+                    counter.quantity,
+                    counter.total_amount,
+                ):
+                    (
+                        counter.sale_count,
+                        counter.quantity,
+                        counter.total_amount,
+                    ) = totals
+                    changed.append(counter)
+            missing = [
+                ProductSalesCounter(
+                    period=period,
+                    period_start=start,
+                    product_id=product_id,
+                    sale_count=count,
+                    quantity=quantity,
+                    total_amount=total,
+                )
+                for (period, start, product_id), (count, quantity, total) in (
+                    expected.items()
+                )
+            ]
+
+            if not options["dry_run"]:
+                ProductSalesCounter.objects.filter(pk__in=stale).delete()
+                ProductSalesCounter.objects.bulk_update(
+                    changed,
+                    ["sale_count", "quantity", "total_amount"],
+                    batch_size=1000,
+                )
+                ProductSalesCounter.objects.bulk_create(missing, batch_size=1000)
+
+        verb = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {len(changed)} drifted, {len(missing)} missing and "
+                f"{len(stale)} stale product sales counters"
+            )
+        )
+
+    def count_sales(self, date_from):
+        """Expected {(period, period_start, product_id): (count, quantity,
+        total)} from the raw sales, folded from one query grouped by
+        business date and product"""
+        sales = Sale.objects.all()
+        if date_from:
+            start = business_day_bounds(period_start(date_from, "month"))[0]
+            sales = sales.filter(created_at__gte=start)
+        rows = (
+            sales.annotate(
+                business_date=TruncDate("created_at", tzinfo=BUSINESS_TIMEZONE)
+            )
+            .values("business_date", "product")
+            .annotate(
+                sale_count=Count("id"),
+                total_quantity=Sum("quantity"),
+                total=Sum("total_amount"),
+            )
+            .order_by()
+        )
+
+        expected = {}
+        for row in rows.iterator():
+            for period, _ in ProductSalesCounter.PERIODS:
+                start = period_start(row["business_date"], period)
+                if date_from and start < period_start(date_from, period):
+                    continue
+                key = (period, start, row["product"])
+                count, quantity, total = expected.get(key, (0, 0, 0))
+                expected[key] = (
+                    count + row["sale_count"],
+                    quantity + row["total_quantity"],
+                    total + row["total"],
+                )
+        return expected
+
+    def parse_date(self, value):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
@@ -1,6 +1,12 @@
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
-from dashboard.models import Sale, Product, Category, PaymentMethod
+from dashboard.models import (
+    Sale,
+    Product,
+    Category,
+    PaymentMethod,
+    DailySalesRollup,
+)
 
 
 class Command(BaseCommand):
@@ -14,6 +20,9 @@ class Command(BaseCommand):
         Sale.objects.all().delete()
         self.stdout.write(f"Deleted {sales_count} sales")
 
+        # Delete the sales rollup built from them
+        DailySalesRollup.objects.all().delete()
+
         # Delete all products
         products_count = Product.objects.count()
         Product.objects.all().delete()
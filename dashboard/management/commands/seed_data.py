@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
-from dashboard.models import Category, PaymentMethod, Product, Sale
+from dashboard.models import Category, InsufficientStock, PaymentMethod, Product, Sale
 import random
 
 
@@ -245,17 +245,21 @@ class Command(BaseCommand):
                 unit_price = float(product.price)
                 total_amount = quantity * unit_price
 
-                sale = Sale.objects.create(
-                    product=product,
-                    quantity=quantity,
-                    unit_price=unit_price,
-                    total_amount=total_amount,
-                    payment_method=payment_method,
-                    customer_name=f"Customer {i+1}",
-                    customer_phone=f"+8801{random.randint(100000000, 999999999)}",
-                    notes=f"Sample sale {i+1}",
-                    created_at=sale_date,
-                )
+                try:
+                    sale = Sale.objects.create(
+                        product=product,
+                        quantity=quantity,
+                        unit_price=unit_price,
+                        total_amount=total_amount,
+                        payment_method=payment_method,
+                        customer_name=f"Customer {i+1}",
+                        customer_phone=f"+8801{random.randint(100000000, 999999999)}",
+                        notes=f"Sample sale {i+1}",
+                        created_at=sale_date,
+                    )
+                except InsufficientStock as e:
+                    self.stdout.write(f"Skipped sale: {e}")
+                    continue
                 self.stdout.write(f"Created sale: {sale}")
 
         self.stdout.write(
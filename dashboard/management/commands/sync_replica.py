@@ -0,0 +1,51 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.routers import REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite database to the replica file (DB_REPLICA_NAME), a "
+        "local stand-in for replication. With --every, keeps copying."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=float,
+            help="Copy again every this many seconds until interrupted",
+        )
+
+    def handle(self, *args, **options):
+        replica = settings.DATABASES.get(REPLICA_ALIAS)
+        if replica is None:
+            raise CommandError("No replica configured; set DB_REPLICA_NAME")
+        primary = settings.DATABASES["default"]
+        if "sqlite" not in primary["ENGINE"] or "sqlite" not in replica["ENGINE"]:
+            raise CommandError(
+                "Only SQLite replicas can be synced; use MySQL's own replication"
+            )
+
+        while True:
+            started = time.perf_counter()
+            self.copy(primary["NAME"], replica["NAME"])
+            self.stdout.write(
+                f"Synced {replica['NAME']} in {time.perf_counter() - started:.2f}s"
+            )
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
+
+    def copy(self, source_name, target_name):
+        # The backup API copies a consistent snapshot while workers keep
+        # writing, and replaces the replica's pages under its readers
+        source = sqlite3.connect(str(source_name))
+        target = sqlite3.connect(str(target_name))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,103 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:12
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+import pytz
+
+
+def build_rollup(apps, schema_editor):
+    Sale = apps.get_model("dashboard", "Sale")
+    DailySalesRollup = apps.get_model("dashboard", "DailySalesRollup")
+
+    # Sales don't record their category yet, so this groups on the
+    # product's; 0013 regroups on the category each sale is recorded under
+    rows = (
+        Sale.objects.annotate(
+            business_date=TruncDate("created_at", tzinfo=pytz.timezone("Asia/Dhaka"))
+        )
+        .values("business_date", "product__category", "payment_method", "product")
+        .annotate(
+            sale_count=Count("id"),
+            total_quantity=Sum("quantity"),
+            total=Sum("total_amount"),
+        )
+        .order_by()
+    )
+    DailySalesRollup.objects.bulk_create(
+        (
+            DailySalesRollup(
+                business_date=row["business_date"],
+                category_id=row["product__category"],
+                payment_method_id=row["payment_method"],
+                product_id=row["product"],
+                sale_count=row["sale_count"],
+                quantity=row["total_quantity"],
+                total_amount=row["total"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0002_product_is_quick_action"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySalesRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("business_date", models.DateField()),
+                ("sale_count", models.PositiveIntegerField(default=0)),
+                ("quantity", models.PositiveIntegerField(default=0)),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="dashboard.category",
+                    ),
+                ),
+                (
+                    "payment_method",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="dashboard.paymentmethod",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="dashboard.product",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-business_date"],
+                "unique_together": {
+                    ("business_date", "category", "payment_method", "product")
+                },
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0003_dailysalesrollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="sale",
+            index=models.Index(
+                fields=["created_at", "payment_method"], name="sale_created_payment_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sale",
+            index=models.Index(
+                fields=["created_at", "product"], name="sale_created_product_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0004_sale_report_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sale",
+            name="client_key",
+            field=models.CharField(
+                blank=True,
+                help_text="Client-generated idempotency key, so a replayed sale is only recorded once",
+                max_length=64,
+                null=True,
+                unique=True,
+            ),
+        ),
+    ]
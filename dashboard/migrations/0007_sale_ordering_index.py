@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0006_catalogversion"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="sale",
+            options={"ordering": ["-created_at", "-id"]},
+        ),
+        migrations.AddIndex(
+            model_name="sale",
+            index=models.Index(fields=["created_at", "id"], name="sale_created_id_idx"),
+        ),
+    ]
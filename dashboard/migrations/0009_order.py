@@ -0,0 +1,68 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0008_device"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Order",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("customer_name", models.CharField(blank=True, max_length=100)),
+                ("customer_phone", models.CharField(blank=True, max_length=20)),
+                ("notes", models.TextField(blank=True)),
+                (
+                    "client_key",
+                    models.CharField(
+                        blank=True,
+                        help_text="Client-generated idempotency key, so a replayed order is only recorded once",
+                        max_length=64,
+                        null=True,
+                        unique=True,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "payment_method",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="orders",
+                        to="dashboard.paymentmethod",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at", "-id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="sale",
+            name="order",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="The order this sale is a line of, if any",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="lines",
+                to="dashboard.order",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:07
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_sale_names(apps, schema_editor):
+    Sale = apps.get_model("dashboard", "Sale")
+    Product = apps.get_model("dashboard", "Product")
+    PaymentMethod = apps.get_model("dashboard", "PaymentMethod")
+
+    # Earlier names weren't kept; the current ones are the best record left
+    product = Product.objects.filter(pk=OuterRef("product_id"))
+    Sale.objects.update(
+        product_name=Subquery(product.values("name")[:1]),
+        category_name=Subquery(product.values("category__name")[:1]),
+        payment_method_name=Subquery(
+            PaymentMethod.objects.filter(pk=OuterRef("payment_method_id")).values(
+                "name"
+            )[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0009_order"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sale",
+            name="category_name",
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="sale",
+            name="payment_method_name",
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name="sale",
+            name="product_name",
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_sale_names, migrations.RunPython.noop),
+    ]
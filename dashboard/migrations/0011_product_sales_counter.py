@@ -0,0 +1,129 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:11
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+import pytz
+
+
+def build_counters(apps, schema_editor):
+    Sale = apps.get_model("dashboard", "Sale")
+    ProductSalesCounter = apps.get_model("dashboard", "ProductSalesCounter")
+
+    rows = (
+        Sale.objects.annotate(
+            business_date=TruncDate("created_at", tzinfo=pytz.timezone("Asia/Dhaka"))
+        )
+        .values("business_date", "product")
+        .annotate(
+            sale_count=Count("id"),
+            total_quantity=Sum("quantity"),
+            total=Sum("total_amount"),
+        )
+        .order_by()
+    )
+
+    # Fold each business date into its day, week (from Monday) and month
+    totals = {}
+    for row in rows.iterator():
+        day = row["business_date"]
+        starts = {
+            "day": day,
+            "week": day - timedelta(days=day.weekday()),
+            "month": day.replace(day=1),
+        }
+        for period, start in starts.items():
+            key = (period, start, row["product"])
+            count, quantity, total = totals.get(key, (0, 0, 0))
+            totals[key] = (
+                count + row["sale_count"],
+                quantity + row["total_quantity"],
+                total + row["total"],
+            )
+
+    ProductSalesCounter.objects.bulk_create(
+        (
+            ProductSalesCounter(
+                period=period,
+                period_start=start,
+                product_id=product_id,
+                sale_count=count,
+                quantity=quantity,
+                total_amount=total,
+            )
+            for (period, start, product_id), (count, quantity, total) in (
+                totals.items()
+            )
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0010_sale_name_snapshots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductSalesCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sale_count", models.PositiveIntegerField(default=0)),
+                ("quantity", models.PositiveIntegerField(default=0)),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("day", "Day"), ("week", "Week"), ("month", "Month")],
+                        max_length=5,
+                    ),
+                ),
+                ("period_start", models.DateField()),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_counters",
+                        to="dashboard.product",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-period_start", "-total_amount"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="productsalescounter",
+            index=models.Index(
+                fields=["period", "period_start", "-total_amount"],
+                name="counter_top_revenue_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productsalescounter",
+            index=models.Index(
+                fields=["period", "period_start", "-quantity"],
+                name="counter_top_quantity_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="productsalescounter",
+            unique_together={("period", "period_start", "product")},
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:14
+
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+import django.db.models.deletion
+
+
+def set_stock_status(apps, schema_editor):
+    Product = apps.get_model("dashboard", "Product")
+    Product.objects.update(
+        stock_status=Case(
+            When(product_type="stockable", stock_quantity__lte=0, then=Value("out")),
+            When(
+                product_type="stockable",
+                stock_quantity__lte=F("min_stock_level"),
+                then=Value("low"),
+            ),
+            default=Value("ok"),
+            output_field=models.CharField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0011_product_sales_counter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockAlert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "previous_status",
+                    models.CharField(
+                        choices=[
+                            ("ok", "In stock"),
+                            ("low", "Low stock"),
+                            ("out", "Out of stock"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("ok", "In stock"),
+                            ("low", "Low stock"),
+                            ("out", "Out of stock"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                ("stock_quantity", models.PositiveIntegerField()),
+                ("min_stock_level", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="stock_status",
+            field=models.CharField(
+                choices=[
+                    ("ok", "In stock"),
+                    ("low", "Low stock"),
+                    ("out", "Out of stock"),
+                ],
+                default="ok",
+                editable=False,
+                max_length=3,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["stock_status"], name="product_stock_status_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="stockalert",
+            name="product",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="stock_alerts",
+                to="dashboard.product",
+            ),
+        ),
+        migrations.RunPython(set_stock_status, migrations.RunPython.noop),
+    ]
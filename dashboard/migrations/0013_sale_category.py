@@ -0,0 +1,73 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+import pytz
+
+
+def record_sale_categories(apps, schema_editor):
+    Sale = apps.get_model("dashboard", "Sale")
+    Product = apps.get_model("dashboard", "Product")
+    DailySalesRollup = apps.get_model("dashboard", "DailySalesRollup")
+
+    # Earlier categories weren't kept; the products' current ones are the
+    # best record left
+    Sale.objects.update(
+        category_id=Subquery(
+            Product.objects.filter(pk=OuterRef("product_id")).values("category_id")[:1]
+        )
+    )
+
+    # Regroup the rollup on the recorded categories, so removing a sale
+    # always finds the row it was added to
+    rows = (
+        Sale.objects.annotate(
+            business_date=TruncDate("created_at", tzinfo=pytz.timezone("Asia/Dhaka"))
+        )
+        .values("business_date", "category", "payment_method", "product")
+        .annotate(
+            sale_count=Count("id"),
+            total_quantity=Sum("quantity"),
+            total=Sum("total_amount"),
+        )
+        .order_by()
+    )
+    DailySalesRollup.objects.all().delete()
+    DailySalesRollup.objects.bulk_create(
+        (
+            DailySalesRollup(
+                business_date=row["business_date"],
+                category_id=row["category"],
+                payment_method_id=row["payment_method"],
+                product_id=row["product"],
+                sale_count=row["sale_count"],
+                quantity=row["total_quantity"],
+                total_amount=row["total"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0012_stock_alerts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sale",
+            name="category",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="sales",
+                to="dashboard.category",
+            ),
+        ),
+        migrations.RunPython(record_sale_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def clear_bulk_client_keys(apps, schema_editor):
+    Sale = apps.get_model("dashboard", "Sale")
+
+    # Bulk sales sent without a key were briefly given a generated one to be
+    # read back by; they were never idempotency keys
+    Sale.objects.filter(client_key__regex=r"^bulk-[0-9a-f]{16}-[0-9]+$").update(
+        client_key=None
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0013_sale_category"),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_bulk_client_keys, migrations.RunPython.noop),
+    ]
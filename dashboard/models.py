@@ -1,8 +1,15 @@
-from django.db import models
+import hashlib
+import secrets
+
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import Case, F, Prefetch, Value, When, prefetch_related_objects
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import RegexValidator
 
+from .signals import sales_committed, stock_alerts_committed
+from .utils import business_date, period_start
+
 
 class UserManager(BaseUserManager):
     def create_user(self, phone, first_name, last_name, password=None, **extra_fields):
@@ -49,6 +56,17 @@ class User(AbstractUser):
         return f"{self.first_name} {self.last_name} ({self.phone})"
 
 
+class InsufficientStock(Exception):
+    """A sale asked for more of a stockable product than is in stock"""
+
+    def __init__(self, product, quantity):
+        self.product = product
+        self.quantity = quantity
+        super().__init__(
+            f"Insufficient stock for '{product.name}': requested {quantity}"
+        )
+
+
 class PaymentMethod(models.Model):
     name = models.CharField(max_length=50, unique=True)
     is_active = models.BooleanField(default=True)
@@ -79,6 +97,13 @@ class Product(models.Model):
         ("stockable", "Stockable (Inventory)"),
         ("non_stockable", "Non-Stockable (Instant)"),
     ]
+    STOCK_STATUSES = [
+        ("ok", "In stock"),
+        ("low", "Low stock"),
+        ("out", "Out of stock"),
+    ]
+    # Statuses listed as low stock
+    LOW_STOCK_STATUSES = ["low", "out"]
 
     name = models.CharField(max_length=100, unique=True)
     category = models.ForeignKey(
@@ -94,6 +119,11 @@ class Product(models.Model):
     min_stock_level = models.PositiveIntegerField(
         default=0, help_text="Minimum stock level for alerts"
     )
+    # Kept in step with the stock by record_stock_status, so low stock is an
+    # indexed lookup and each change of status is recorded as a StockAlert
+    stock_status = models.CharField(
+        max_length=3, choices=STOCK_STATUSES, default="ok", editable=False
+    )
     is_quick_action = models.BooleanField(
         default=False, help_text="Show this product in Quick Actions section"
     )
@@ -103,10 +133,42 @@ class Product(models.Model):
 
     class Meta:
         ordering = ["category__name", "name"]
+        indexes = [
+            models.Index(fields=["stock_status"], name="product_stock_status_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.category.name})"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get("force_insert"):
+            # Sales change the stock while a product is being edited, so a
+            # save never writes it back; stock edits go through change_stock
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                ]
+            kwargs["update_fields"] = [
+                name for name in update_fields if name != "stock_quantity"
+            ]
+
+        with transaction.atomic():
+            # Save the status as recorded, so an edited minimum level is
+            # detected like any other stock change
+            if self.pk:
+                self.stock_status = (
+                    Product.objects.filter(pk=self.pk)
+                    .values_list("stock_status", flat=True)
+                    .first()
+                    or self.stock_status
+                )
+            super().save(*args, **kwargs)
+            changed = Product.record_stock_status([self.pk])
+            self.stock_status = changed.get(self.pk, self.stock_status)
+
     @property
     def is_low_stock(self):
         """Check if stock is below minimum level"""
@@ -121,40 +183,647 @@ class Product(models.Model):
         return self.product_type == "stockable" and self.stock_quantity <= 0
 
     def update_stock(self, quantity_change):
-        """Update stock quantity (positive for addition, negative for reduction)"""
-        if self.product_type == "stockable":
-            self.stock_quantity += quantity_change
-            if self.stock_quantity < 0:
-                self.stock_quantity = 0
-            self.save()
+        """Update stock quantity (positive for addition, negative for reduction).
+
+        Returns False, changing nothing, if a reduction exceeds the stock.
+        """
+        if self.product_type != "stockable":
+            return True
+        if not Product.change_stock(self.pk, quantity_change):
+            return False
+        self.stock_quantity += quantity_change
+        return True
+
+    @classmethod
+    def change_stock(cls, product_id, quantity_change):
+        """Atomically add to or take from a stockable product's stock.
+
+        A single conditional UPDATE of the stock column only: concurrent sales
+        can't oversell or overwrite each other's (or an admin's) edits, and
+        only the product's own row is locked. Returns False, changing nothing,
+        if a reduction exceeds the stock.
+        """
+        products = cls.objects.filter(pk=product_id, product_type="stockable")
+        if quantity_change < 0:
+            products = products.filter(stock_quantity__gte=-quantity_change)
+        with transaction.atomic(savepoint=False):
+            updated = products.update(
+                stock_quantity=F("stock_quantity") + quantity_change
+            )
+            if updated:
+                cls.record_stock_status([product_id])
+                CatalogVersion.bump()
+        return updated == 1
+
+    @classmethod
+    def take_stock(cls, quantities):
+        """Take {product_id: quantity} from stockable products' stock with
+        one conditional UPDATE.
+
+        Like change_stock, concurrent sales can't oversell, and the single
+        statement locks the rows in one order so concurrent calls can't
+        deadlock. Returns the ids of the products that can't cover their
+        quantity; if there are any, nothing is changed. A failed UPDATE
+        always returns at least one id.
+        """
+        quantities = {
+            product_id: quantity
+            for product_id, quantity in quantities.items()
+            if quantity
+        }
+        if not quantities:
+            return []
+
+        wanted = Case(
+            *(
+                When(pk=product_id, then=Value(quantity))
+                for product_id, quantity in quantities.items()
+            ),
+            output_field=models.PositiveIntegerField(),
+        )
+        with transaction.atomic():
+            updated = cls.objects.filter(
+                pk__in=quantities,
+                product_type="stockable",
+                stock_quantity__gte=wanted,
+            ).update(stock_quantity=F("stock_quantity") - wanted)
+            if updated == len(quantities):
+                cls.record_stock_status(list(quantities))
+                CatalogVersion.bump()
+                return []
+            transaction.set_rollback(True)
+
+        # Name the products that fell short; if stock was added since the
+        # UPDATE ran, all of them, as nothing was taken
+        stock = dict(
+            cls.objects.filter(pk__in=quantities).values_list("id", "stock_quantity")
+        )
+        short = [
+            product_id
+            for product_id, quantity in quantities.items()
+            if stock.get(product_id, 0) < quantity
+        ]
+        return short or list(quantities)
+
+    @staticmethod
+    def stock_status_expression():
+        """stock_status computed from a product's stock columns"""
+        return Case(
+            When(product_type="stockable", stock_quantity__lte=0, then=Value("out")),
+            When(
+                product_type="stockable",
+                stock_quantity__lte=F("min_stock_level"),
+                then=Value("low"),
+            ),
+            default=Value("ok"),
+            output_field=models.CharField(),
+        )
+
+    @classmethod
+    def record_stock_status(cls, product_ids):
+        """Bring products' stock_status in step with their stock, recording a
+        StockAlert for each whose status changed.
+
+        Run in the transaction that changed the stock, after changing it.
+        Costs one query when no status changed, which is nearly always.
+        Returns {product_id: new status} of the products that changed.
+        """
+        changed = list(
+            cls.objects.filter(pk__in=product_ids)
+            .annotate(current_status=cls.stock_status_expression())
+            .exclude(stock_status=F("current_status"))
+            .values_list(
+                "id",
+                "stock_status",
+                "current_status",
+                "stock_quantity",
+                "min_stock_level",
+            )
+        )
+        alerts = []
+        for product_id, previous, status, stock_quantity, min_stock_level in changed:
+            cls.objects.filter(pk=product_id).update(stock_status=status)
+            alerts.append(
+                StockAlert.objects.create(
+                    product_id=product_id,
+                    previous_status=previous,
+                    status=status,
+                    stock_quantity=stock_quantity,
+                    min_stock_level=min_stock_level,
+                )
+            )
+        if alerts:
+            transaction.on_commit(
+                lambda: stock_alerts_committed.send(sender=StockAlert, alerts=alerts)
+            )
+        return {product_id: status for product_id, _, status, _, _ in changed}
+
+
+class StockAlert(models.Model):
+    """A product's stock status changing, e.g. running low or out, or being
+    restocked. Recorded in the transaction that changed the stock; clients
+    follow new alerts by id with /api/stock-alerts/?since=.
+    """
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="stock_alerts"
+    )
+    previous_status = models.CharField(max_length=3, choices=Product.STOCK_STATUSES)
+    status = models.CharField(max_length=3, choices=Product.STOCK_STATUSES)
+    stock_quantity = models.PositiveIntegerField()
+    min_stock_level = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.previous_status} -> {self.status}"
+
+
+class Order(models.Model):
+    """One checkout: a ticket whose line items are Sales.
+
+    Each line is an ordinary Sale sharing the order's payment method and
+    customer details, so everything reading sales sees order lines too.
+    """
+
+    payment_method = models.ForeignKey(
+        PaymentMethod, on_delete=models.CASCADE, related_name="orders"
+    )
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    customer_name = models.CharField(max_length=100, blank=True)
+    customer_phone = models.CharField(max_length=20, blank=True)
+    notes = models.TextField(blank=True)
+    client_key = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Client-generated idempotency key, so a replayed order is only recorded once",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+
+    def __str__(self):
+        return f"Order {self.pk} - {self.total_amount}"
+
+    @staticmethod
+    def lines_prefetch():
+        """Prefetch of orders' lines in the order they were added"""
+        return Prefetch("lines", queryset=Sale.objects.order_by("id"))
+
+    @classmethod
+    def place(cls, order, lines):
+        """Save a new order with its lines (unsaved Sales with their product
+        loaded) in one transaction, returning the saved lines.
+
+        One conditional UPDATE takes the stock for every line and one INSERT
+        adds them; InsufficientStock is raised, and nothing is saved, if a
+        product can't cover the total ordered.
+        """
+        quantities = {}
+        for line in lines:
+            line.payment_method = order.payment_method
+            line.customer_name = order.customer_name
+            line.customer_phone = order.customer_phone
+            line.calculate_total()
+            line.capture_names()
+            if line.product.product_type == "stockable":
+                quantities[line.product_id] = (
+                    quantities.get(line.product_id, 0) + line.quantity
+                )
+        order.total_amount = sum(line.total_amount for line in lines)
+
+        with transaction.atomic():
+            short = Product.take_stock(quantities)
+            if short:
+                product = next(
+                    line.product for line in lines if line.product_id == short[0]
+                )
+                raise InsufficientStock(product, quantities[short[0]])
+
+            order.save()
+            for line in lines:
+                line.order = order
+            lines = Sale.objects.bulk_create(lines)
+            record_sale_totals(lines)
+            if lines[0].pk is None:
+                # The database can't return the new ids from a bulk insert;
+                # reading them back also fills order.lines
+                prefetch_related_objects([order], cls.lines_prefetch())
+                lines = list(order.lines.all())
+            transaction.on_commit(
+                lambda: sales_committed.send(sender=Sale, sales=lines)
+            )
+        return lines
 
 
 class Sale(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sales")
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="lines",
+        help_text="The order this sale is a line of, if any",
+    )
     quantity = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.ForeignKey(
         PaymentMethod, on_delete=models.CASCADE, related_name="sales"
     )
+    # The category the sale was recorded under, so it is taken out of the
+    # same rollup row it was added to after its product is recategorised.
+    # Protected, as deleting the category mustn't take recorded sales with it
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.PROTECT,
+        null=True,
+        editable=False,
+        related_name="sales",
+    )
+    # Names as they were when the sale was made, so listings and exports
+    # need no joins and keep their meaning after a rename or recategorising
+    product_name = models.CharField(max_length=100, blank=True, editable=False)
+    category_name = models.CharField(max_length=100, blank=True, editable=False)
+    payment_method_name = models.CharField(max_length=50, blank=True, editable=False)
     customer_name = models.CharField(max_length=100, blank=True)
     customer_phone = models.CharField(max_length=20, blank=True)
     notes = models.TextField(blank=True)
+    client_key = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Client-generated idempotency key, so a replayed sale is only recorded once",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # Stable newest-first ordering for listings and cursor pagination
+            models.Index(fields=["created_at", "id"], name="sale_created_id_idx"),
+            # Every report filters on a created_at range; the second column
+            # lets the per-payment and per-product groupings read it too
+            models.Index(
+                fields=["created_at", "payment_method"],
+                name="sale_created_payment_idx",
+            ),
+            models.Index(
+                fields=["created_at", "product"], name="sale_created_product_idx"
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.product.name} - {self.total_amount}"
+        return f"{self.product_name} - {self.total_amount}"
 
     def save(self, *args, **kwargs):
-        # Auto-calculate total amount if not provided
+        self.calculate_total()
+
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = Sale.objects.filter(pk=self.pk).first()
+
+            # Update stock if this is a new sale and product is stockable
+            created = not self.pk
+            if created and not self.product.update_stock(-self.quantity):
+                raise InsufficientStock(self.product, self.quantity)
+
+            if created or (
+                previous is not None
+                and (previous.product_id, previous.payment_method_id)
+                != (self.product_id, self.payment_method_id)
+            ):
+                self.capture_names()
+
+            super().save(*args, **kwargs)
+
+            # Keep the daily rollup and product counters in step with this sale
+            if previous is not None:
+                record_sale_totals([previous], sign=-1)
+            record_sale_totals([self])
+
+            if created:
+                transaction.on_commit(
+                    lambda: sales_committed.send(sender=Sale, sales=[self])
+                )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            record_sale_totals([self], sign=-1)
+            return super().delete(*args, **kwargs)
+
+    def calculate_total(self):
+        """Auto-calculate total amount if not provided"""
         if not self.total_amount:
             self.total_amount = self.quantity * self.unit_price
 
-        # Update stock if this is a new sale and product is stockable
-        if not self.pk and self.product.product_type == "stockable":
-            self.product.update_stock(-self.quantity)
+    def capture_names(self):
+        """Snapshot the product, category and payment method names, and the
+        category the sale is recorded under"""
+        self.category_id = self.product.category_id
+        self.product_name = self.product.name
+        self.category_name = self.product.category.name
+        self.payment_method_name = self.payment_method.name
+
+    @classmethod
+    def bulk_record(cls, sales):
+        """Insert new sales with one INSERT (one per sale where the database
+        can't return the new ids from it), in one transaction with their
+        stock and rollup updates.
+
+        Stock is decremented with a single conditional UPDATE per product;
+        InsufficientStock is raised, and nothing is saved, if any product
+        can't cover its total. sale.product must already be loaded. Returns
+        the saved sales, with their ids, in the order given.
+        """
+        returns_ids = connections[
+            router.db_for_write(cls)
+        ].features.can_return_rows_from_bulk_insert
+        stock_changes = {}
+        for sale in sales:
+            sale.calculate_total()
+            sale.capture_names()
+            if sale.product.product_type == "stockable":
+                stock_changes[sale.product_id] = (
+                    stock_changes.get(sale.product_id, 0) + sale.quantity
+                )
+
+        with transaction.atomic():
+            # Lock products in id order so concurrent batches can't deadlock
+            for product_id, quantity in sorted(stock_changes.items()):
+                if not Product.change_stock(product_id, -quantity):
+                    product = next(
+                        sale.product for sale in sales if sale.product_id == product_id
+                    )
+                    raise InsufficientStock(product, quantity)
+            if returns_ids:
+                created = cls.objects.bulk_create(sales)
+            else:
+                # The database can't return the new ids from a bulk insert,
+                # so insert the sales one by one. Model.save, as Sale.save
+                # would take the stock again.
+                for sale in sales:
+                    models.Model.save(sale, force_insert=True)
+                created = sales
+            record_sale_totals(created)
+            transaction.on_commit(
+                lambda: sales_committed.send(sender=cls, sales=created)
+            )
+        return created
+
+
+class SalesTotals(models.Model):
+    """Sale count, quantity and total kept up to date per key by adding
+    each sale as it is recorded"""
+
+    sale_count = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def _apply(cls, key, count, quantity, total):
+        changes = {
+            "sale_count": F("sale_count") + count,
+            "quantity": F("quantity") + quantity,
+            "total_amount": F("total_amount") + total,
+        }
+        if cls.objects.filter(**key).update(**changes):
+            return
+        if count < 0:
+            # No row to take the sale away from; rebuilding or reconciling
+            # from the sales repairs it
+            return
+
+        try:
+            # Savepoint so a concurrent insert of the same key doesn't
+            # break the caller's transaction
+            with transaction.atomic():
+                cls.objects.create(
+                    sale_count=count, quantity=quantity, total_amount=total, **key
+                )
+        except IntegrityError:
+            cls.objects.filter(**key).update(**changes)
+
+
+def record_sale_totals(sales, sign=1):
+    """Add (sign=1) or remove (sign=-1) sales from the daily rollup and the
+    product sales counters.
+
+    Must run inside the transaction that writes the sales so neither ever
+    disagrees with the raw rows.
+    """
+    sales = list(sales)
+    DailySalesRollup.record_sales(sales, sign)
+    ProductSalesCounter.record_sales(sales, sign)
+
+
+class DailySalesRollup(SalesTotals):
+    """Sales pre-aggregated per business day, category, payment method and product"""
+
+    business_date = models.DateField()
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    payment_method = models.ForeignKey(
+        PaymentMethod, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+
+    class Meta:
+        ordering = ["-business_date"]
+        unique_together = [
+            ("business_date", "category", "payment_method", "product"),
+        ]
+
+    def __str__(self):
+        return f"{self.business_date} - {self.product_id} - {self.total_amount}"
+
+    @classmethod
+    def record_sales(cls, sales, sign=1):
+        """Add (sign=1) or remove (sign=-1) sales from the rollup.
+
+        Must run inside the transaction that writes the sales so the rollup
+        never disagrees with the raw rows.
+        """
+        deltas = {}
+        for sale in sales:
+            key = (
+                business_date(sale.created_at),
+                # Where the sale was recorded, wherever its product is now
+                sale.category_id,
+                sale.payment_method_id,
+                sale.product_id,
+            )
+            count, quantity, total = deltas.get(key, (0, 0, 0))
+            deltas[key] = (
+                count + 1,
+                quantity + sale.quantity,
+                total + sale.total_amount,
+            )
+
+        for (day, category_id, payment_method_id, product_id), (
+            count,
+            quantity,
+            total,
+        ) in deltas.items():
+            key = {
+                "business_date": day,
+                "category_id": category_id,
+                "payment_method_id": payment_method_id,
+                "product_id": product_id,
+            }
+            cls._apply(key, sign * count, sign * quantity, sign * total)
+
+
+class ProductSalesCounter(SalesTotals):
+    """Sales per product per business day, week (from Monday) and month.
+
+    Kept up to date as sales are recorded so the top sellers of a period are
+    an indexed top-N read; reconcile_product_counters repairs any drift.
+    """
+
+    PERIODS = [
+        ("day", "Day"),
+        ("week", "Week"),
+        ("month", "Month"),
+    ]
+
+    period = models.CharField(max_length=5, choices=PERIODS)
+    period_start = models.DateField()
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="sales_counters"
+    )
+
+    class Meta:
+        ordering = ["-period_start", "-total_amount"]
+        unique_together = [("period", "period_start", "product")]
+        indexes = [
+            models.Index(
+                fields=["period", "period_start", "-total_amount"],
+                name="counter_top_revenue_idx",
+            ),
+            models.Index(
+                fields=["period", "period_start", "-quantity"],
+                name="counter_top_quantity_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.period_start} - {self.product_id} - {self.total_amount}"
+
+    @classmethod
+    def record_sales(cls, sales, sign=1):
+        """Add (sign=1) or remove (sign=-1) sales from the counters of every
+        period they fall in"""
+        deltas = {}
+        for sale in sales:
+            day = business_date(sale.created_at)
+            for period, _ in cls.PERIODS:
+                key = (period, period_start(day, period), sale.product_id)
+                count, quantity, total = deltas.get(key, (0, 0, 0))
+                deltas[key] = (
+                    count + 1,
+                    quantity + sale.quantity,
+                    total + sale.total_amount,
+                )
+
+        for (period, start, product_id), (count, quantity, total) in deltas.items():
+            key = {"period": period, "period_start": start, "product_id": product_id}
+            cls._apply(key, sign * count, sign * quantity, sign * total)
+
+
+class CatalogVersion(models.Model):
+    """Single-row counter bumped whenever products, categories or payment
+    methods change.
+
+    Catalog endpoints serve it as their ETag, so telling whether a client's
+    copy is current costs one primary key lookup instead of a table scan.
+    """
+
+    SINGLETON_ID = 1
+
+    version = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"Catalog version {self.version}"
+
+    @classmethod
+    def current(cls):
+        version = (
+            cls.objects.filter(pk=cls.SINGLETON_ID)
+            .values_list("version", flat=True)
+            .first()
+        )
+        if version is None:
+            version = cls.objects.get_or_create(pk=cls.SINGLETON_ID)[0].version
+        return version
+
+    @classmethod
+    def bump(cls):
+        """Bump the version once the current transaction commits.
+
+        Deferring it keeps the shared row out of sale transactions, so it is
+        only ever locked for one short UPDATE.
+        """
+        transaction.on_commit(cls._increment)
+
+    @classmethod
+    def _increment(cls):
+        versions = cls.objects.filter(pk=cls.SINGLETON_ID)
+        if not versions.update(version=F("version") + 1):
+            cls.objects.get_or_create(pk=cls.SINGLETON_ID, defaults={"version": 2})
+
+
+class Device(models.Model):
+    """A POS terminal authenticating to the API with a long-lived token.
+
+    Only a SHA-256 hash of the token is stored; the token itself is shown
+    once, when the device is registered.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="devices")
+    name = models.CharField(max_length=100)
+    token_hash = models.CharField(max_length=64, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.name} ({self.user.phone})"
+
+    @property
+    def is_revoked(self):
+        return self.revoked_at is not None
+
+    @staticmethod
+    def hash_token(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    def register(cls, user, name):
+        """Create a device for a user, returning it with its new token"""
+        token = secrets.token_urlsafe(32)
+        device = cls.objects.create(
+            user=user, name=name, token_hash=cls.hash_token(token)
+        )
+        return device, token
 
-        super().save(*args, **kwargs)
+    def revoke(self):
+        if self.revoked_at is None:
+            self.revoked_at = timezone.now()
+            self.save(update_fields=["revoked_at"])
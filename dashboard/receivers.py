@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .auth_backend import forget_device, forget_user
+from .models import CatalogVersion, Category, Device, PaymentMethod, Product, User
+
+
+def bump_catalog_version(sender, **kwargs):
+    CatalogVersion.bump()
+
+
+def forget_cached_user(sender, instance, **kwargs):
+    # After commit, so a concurrent request can't cache the old row again
+    transaction.on_commit(lambda: forget_user(instance.pk))
+
+
+def forget_cached_device(sender, instance, **kwargs):
+    transaction.on_commit(lambda: forget_device(instance.token_hash))
+
+
+for model in (Product, Category, PaymentMethod):
+    post_save.connect(bump_catalog_version, sender=model)
+    post_delete.connect(bump_catalog_version, sender=model)
+
+post_save.connect(forget_cached_user, sender=User)
+post_delete.connect(forget_cached_user, sender=User)
+post_save.connect(forget_cached_device, sender=Device)
+post_delete.connect(forget_cached_device, sender=Device)
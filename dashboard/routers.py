@@ -0,0 +1,122 @@
+"""Send report reads to the "replica" database, when one is configured.
+
+Reads only go to the replica inside replica_reads() (or a view decorated
+with use_replica), only for the reporting models, and never once the
+request has written anything, so a client always reads its own writes.
+ReplicaPinMiddleware carries that pin over to the client's next requests
+for REPLICA_PIN_SECONDS, to cover replication lag. Writes always go to the
+primary.
+"""
+
+import functools
+from asyncio import iscoroutinefunction
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = "replica"
+
+# Models whose reads may be served by the replica
+REPLICA_MODELS = {
+    "dashboard.sale",
+    "dashboard.dailysalesrollup",
+    "dashboard.productsalescounter",
+    "dashboard.product",
+    "dashboard.category",
+    "dashboard.paymentmethod",
+}
+
+
+class ReplicaState:
+    def __init__(self, pinned=False):
+        self.reads = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+replica_state = ContextVar("replica_state", default=None)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def tracking_writes(pinned=False):
+    """Track writes for the duration of a request; yields its ReplicaState"""
+    state = ReplicaState(pinned)
+    token = replica_state.set(state)
+    try:
+        yield state
+    finally:
+        replica_state.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    """Let report reads in the block use the replica"""
+    state = replica_state.get()
+    token = None
+    if state is None:
+        state = ReplicaState()
+        token = replica_state.set(state)
+    reads = state.reads
+    state.reads = True
+    try:
+        yield
+    finally:
+        state.reads = reads
+        if token is not None:
+            replica_state.reset(token)
+
+
+def use_replica(view):
+    """View decorator opting its report reads in to the replica"""
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            with replica_reads():
+                return await view(*args, **kwargs)
+
+    else:
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with replica_reads():
+                return view(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = replica_state.get()
+        if (
+            state is None
+            or not state.reads
+            or state.pinned
+            or state.wrote
+            or model._meta.label_lower not in REPLICA_MODELS
+            or not replica_configured()
+            # Reads in a transaction must see what it wrote
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = replica_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica gets its schema along with its data
+        return db != REPLICA_ALIAS
@@ -0,0 +1,9 @@
+from django.dispatch import Signal
+
+# Sent once the transaction recording new sales has committed, with
+# sales=[the new Sale objects]
+sales_committed = Signal()
+
+# Sent once the transaction that changed products' stock status has
+# committed, with alerts=[the new StockAlert objects]
+stock_alerts_committed = Signal()
@@ -0,0 +1,41 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from pytz import timezone as pytz_timezone
+
+# All sales reporting is done against the shop's local (Bangladesh) day
+BUSINESS_TIMEZONE = pytz_timezone("Asia/Dhaka")
+
+
+def business_now():
+    """Current time in the business timezone"""
+    return timezone.now().astimezone(BUSINESS_TIMEZONE)
+
+
+def business_today():
+    """Today's date in the business timezone"""
+    return business_now().date()
+
+
+def business_date(value):
+    """Business date a timestamp falls on"""
+    return timezone.localtime(value, BUSINESS_TIMEZONE).date()
+
+
+def business_day_bounds(day):
+    """Aware [start, end) datetimes covering a business date"""
+    start = BUSINESS_TIMEZONE.localize(datetime.combine(day, time.min))
+    end = BUSINESS_TIMEZONE.localize(
+        datetime.combine(day + timedelta(days=1), time.min)
+    )
+    return start, end
+
+
+def period_start(day, period):
+    """First business date of the day, week (from Monday) or month a date
+    falls in"""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
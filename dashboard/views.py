@@ -129,9 +129,15 @@ def service_worker(request):
     """Serve service worker - no login required for PWA to work"""
     service_worker_content = """
 // Tea Time Service Worker
-const CACHE_NAME = 'coffee-shop-v3';
-const STATIC_CACHE = 'static-v3';
-const DYNAMIC_CACHE = 'dynamic-v3';
+const CACHE_NAME = 'coffee-shop-v8';
+const STATIC_CACHE = 'static-v8';
+const DYNAMIC_CACHE = 'dynamic-v8';
+
+// Offline sale queue, shared with the page (see static/js/app.js)
+const SALE_QUEUE_DB = 'tea-time';
+const SALE_QUEUE_STORE = 'sale-queue';
+const SALE_REJECTED_STORE = 'sale-rejected';
+const SALE_SYNC_BATCH_SIZE = 50;
 
 const urlsToCache = [
     '/',
@@ -193,6 +199,11 @@ self.addEventListener('fetch', event => {
         return;
     }
 
+    // Leave the live sales feed alone; it never ends, so it can't be cached
+    if (url.pathname === '/api/events/') {
+        return;
+    }
+
     // Handle API requests with network-first strategy
     if (url.pathname.startsWith('/api/')) {
         event.respondWith(
@@ -287,39 +298,52 @@ self.addEventListener('sync', event => {
     }
 });
 
-// Push notifications (for future use)
+// Push notifications
 self.addEventListener('push', event => {
     if (event.data) {
-        const data = event.data.json();
-        const options = {
-            body: data.body || 'New notification from Tea Time',
-            icon: '/static/icons/icon-192x192.png',
-            badge: '/static/icons/icon-72x72.png',
-            vibrate: [100, 50, 100],
-            data: {
-                dateOfArrival: Date.now(),
-                primaryKey: 1
-            },
-            actions: [
-                {
-                    action: 'explore',
-                    title: 'View',
-                    icon: '/static/icons/icon-72x72.png'
-                },
-                {
-                    action: 'close',
-                    title: 'Close',
-                    icon: '/static/icons/icon-72x72.png'
-                }
-            ]
-        };
+        event.waitUntil(showNotification(event.data.json()));
+    }
+});
 
-        event.waitUntil(
-            self.registration.showNotification('Tea Time', options)
-        );
+// Notifications relayed by an open page, e.g. stock alerts from the live
+// feed (see static/js/app.js), shown like pushed ones
+self.addEventListener('message', event => {
+    if (event.data && event.data.type === 'notify') {
+        event.waitUntil(Promise.all(event.data.notifications.map(showNotification)));
     }
 });
 
+function showNotification(data) {
+    const options = {
+        body: data.body || 'New notification from Tea Time',
+        icon: '/static/icons/icon-192x192.png',
+        badge: '/static/icons/icon-72x72.png',
+        vibrate: [100, 50, 100],
+        data: {
+            dateOfArrival: Date.now(),
+            primaryKey: 1
+        },
+        actions: [
+            {
+                action: 'explore',
+                title: 'View',
+                icon: '/static/icons/icon-72x72.png'
+            },
+            {
+                action: 'close',
+                title: 'Close',
+                icon: '/static/icons/icon-72x72.png'
+            }
+        ]
+    };
+    if (data.tag) {
+        // A newer alert for the same product replaces the older one
+        options.tag = data.tag;
+        options.renotify = true;
+    }
+    return self.registration.showNotification('Tea Time', options);
+}
+
 // Notification click handler
 self.addEventListener('notificationclick', event => {
     event.notification.close();
@@ -331,9 +355,98 @@ self.addEventListener('notificationclick', event => {
     }
 });
 
-function doBackgroundSync() {
+function openSaleQueue() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open(SALE_QUEUE_DB, 2);
+        request.onupgradeneeded = () => {
+            const db = request.result;
+            [SALE_QUEUE_STORE, SALE_REJECTED_STORE].forEach(name => {
+                if (!db.objectStoreNames.contains(name)) {
+                    db.createObjectStore(name, { keyPath: 'client_key' });
+                }
+            });
+        };
+        request.onsuccess = () => {
+            // Let a newer page or worker upgrade the database
+            request.result.onversionchange = () => request.result.close();
+            resolve(request.result);
+        };
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function withSaleQueue(mode, callback) {
+    const db = await openSaleQueue();
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction(SALE_QUEUE_STORE, mode);
+        const request = callback(transaction.objectStore(SALE_QUEUE_STORE));
+        transaction.oncomplete = () => resolve(request ? request.result : undefined);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+// Drop created and duplicate sales from the queue, and move rejected ones to
+// their own store so staff can review them instead of losing them
+async function settleSyncedSales(batch, results) {
+    const db = await openSaleQueue();
+    const entries = new Map(batch.map(entry => [entry.client_key, entry]));
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction([SALE_QUEUE_STORE, SALE_REJECTED_STORE], 'readwrite');
+        const queue = transaction.objectStore(SALE_QUEUE_STORE);
+        const rejectedStore = transaction.objectStore(SALE_REJECTED_STORE);
+        results.forEach(result => {
+            if (!result || !result.client_key) return;
+            if (result.status === 'rejected' && entries.has(result.client_key)) {
+                rejectedStore.put({
+                    ...entries.get(result.client_key),
+                    errors: result.errors,
+                    rejected_at: Date.now()
+                });
+            }
+            queue.delete(result.client_key);
+        });
+        transaction.oncomplete = () => resolve();
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+// Replay queued sales in batches; sales carry idempotency keys, so a batch
+// the server already recorded is safe to send again
+async function doBackgroundSync() {
     console.log('Background sync triggered');
-    // Future: Sync offline data when connection is restored
+
+    const queued = await withSaleQueue('readonly', store => store.getAll());
+    let created = 0;
+    let rejected = 0;
+
+    for (let i = 0; i < queued.length; i += SALE_SYNC_BATCH_SIZE) {
+        const batch = queued.slice(i, i + SALE_SYNC_BATCH_SIZE);
+        const response = await fetch('/api/sales/sync/', {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': batch[batch.length - 1].csrf_token,
+            },
+            body: JSON.stringify(batch.map(entry => entry.sale))
+        });
+        if (!response.ok) {
+            // Rejecting makes the browser retry the sync later
+            throw new Error(`Sale sync failed: ${response.status}`);
+        }
+
+        const data = await response.json();
+        await settleSyncedSales(batch, data.results);
+        created += data.created;
+        rejected += data.results.filter(result => result && result.status === 'rejected').length;
+    }
+
+    const windows = await self.clients.matchAll({ type: 'window' });
+    windows.forEach(client => client.postMessage({
+        type: 'offline-sales-synced',
+        created: created,
+        rejected: rejected
+    }));
 }
 """
 
@@ -0,0 +1,23 @@
+import os
+import shutil
+
+# Workers share their Prometheus samples through this directory so /metrics
+# reports totals across all of them (see api/metrics.py). prometheus_client
+# reads it when first imported, so it must be set before anything imports
+# prometheus_client.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join("/tmp", "coffee_shop_metrics")
+)
+
+
+def on_starting(server):
+    # Start from zero rather than adding to a previous run's samples
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -201,6 +201,13 @@ if ('serviceWorker' in navigator) {
             .then((registration) => {
                 console.log('SW registered successfully: ', registration);
 
+                // The service worker reports sales it replayed in the background
+                navigator.serviceWorker.addEventListener('message', (event) => {
+                    if (event.data && event.data.type === 'offline-sales-synced') {
+                        onOfflineSalesSynced(event.data.created, event.data.rejected);
+                    }
+                });
+
                 // Check if there's an update available
                 registration.addEventListener('updatefound', () => {
                     const newWorker = registration.installing;
@@ -253,6 +260,7 @@ document.addEventListener('DOMContentLoaded', function () {
     loadProducts();
     loadQuickActions();
     updateConnectionStatus();
+    connectSalesFeed();
 
     // Event listeners
     window.addEventListener('online', updateConnectionStatus);
@@ -531,6 +539,7 @@ function updateConnectionStatus() {
     if (isOnline) {
         statusDot.className = 'status-dot online';
         statusText.textContent = 'Online';
+        syncOfflineSales();
     } else {
         statusDot.className = 'status-dot offline';
         statusText.textContent = 'Offline';
@@ -568,7 +577,10 @@ function showTab(tabName) {
 
     // Load data based on tab
     if (tabName === 'dashboard') {
-        loadDashboardData();
+        // The live feed keeps the totals current
+        if (!isSalesFeedLive()) {
+            loadDashboardData();
+        }
         loadStockData();
     } else if (tabName === 'today') {
         loadTodaysSales();
@@ -722,13 +734,20 @@ async function addSale(event) {
         payment_method: parseInt(paymentMethodId),
         customer_name: customerName,
         customer_phone: customerPhone,
-        notes: notes
+        notes: notes,
+        // Idempotency key: the server records a sale only once per key
+        client_key: generateClientKey()
     };
 
     console.log('Sending sale data:', sale);
     console.log('Product ID type:', typeof sale.product, 'Value:', sale.product);
     console.log('Payment Method ID type:', typeof sale.payment_method, 'Value:', sale.payment_method);
 
+    if (!navigator.onLine) {
+        await queueOfflineSale(sale);
+        return;
+    }
+
     try {
         await apiRequest('/sales/', {
             method: 'POST',
@@ -750,6 +769,12 @@ async function addSale(event) {
         loadStockData();
 
     } catch (error) {
+        // fetch() rejects with a TypeError when the network is unreachable
+        if (error instanceof TypeError) {
+            await queueOfflineSale(sale);
+            return;
+        }
+
         console.error('Failed to add sale:', error);
 
         // Handle specific error messages from backend
@@ -761,6 +786,228 @@ async function addSale(event) {
     }
 }
 
+// Offline sale queue
+// Sales entered while offline are kept in IndexedDB (shared with the service
+// worker) and replayed in batches through /api/sales/sync/ once back online.
+// Sales the server rejects move to a separate store for staff to review.
+const SALE_QUEUE_DB = 'tea-time';
+const SALE_QUEUE_STORE = 'sale-queue';
+const SALE_REJECTED_STORE = 'sale-rejected';
+const SALE_SYNC_BATCH_SIZE = 50;
+
+function generateClientKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}-${Math.random().toString(36).slice(2)}`;
+}
+
+function openSaleQueue() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open(SALE_QUEUE_DB, 2);
+        request.onupgradeneeded = () => {
+            const db = request.result;
+            [SALE_QUEUE_STORE, SALE_REJECTED_STORE].forEach(name => {
+                if (!db.objectStoreNames.contains(name)) {
+                    db.createObjectStore(name, { keyPath: 'client_key' });
+                }
+            });
+        };
+        request.onsuccess = () => {
+            // Let a newer page or worker upgrade the database
+            request.result.onversionchange = () => request.result.close();
+            resolve(request.result);
+        };
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function withSaleQueue(mode, callback) {
+    const db = await openSaleQueue();
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction(SALE_QUEUE_STORE, mode);
+        const request = callback(transaction.objectStore(SALE_QUEUE_STORE));
+        transaction.oncomplete = () => resolve(request ? request.result : undefined);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+// Drop created and duplicate sales from the queue, and move rejected ones to
+// their own store so staff can review them instead of losing them
+async function settleSyncedSales(batch, results) {
+    const db = await openSaleQueue();
+    const entries = new Map(batch.map(entry => [entry.client_key, entry]));
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction([SALE_QUEUE_STORE, SALE_REJECTED_STORE], 'readwrite');
+        const queue = transaction.objectStore(SALE_QUEUE_STORE);
+        const rejectedStore = transaction.objectStore(SALE_REJECTED_STORE);
+        results.forEach(result => {
+            if (!result || !result.client_key) return;
+            if (result.status === 'rejected' && entries.has(result.client_key)) {
+                rejectedStore.put({
+                    ...entries.get(result.client_key),
+                    errors: result.errors,
+                    rejected_at: Date.now()
+                });
+            }
+            queue.delete(result.client_key);
+        });
+        transaction.oncomplete = () => resolve();
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+async function queueOfflineSale(sale) {
+    try {
+        await withSaleQueue('readwrite', store => store.put({
+            client_key: sale.client_key,
+            sale: sale,
+            csrf_token: getCSRFToken(),
+            queued_at: Date.now()
+        }));
+    } catch (error) {
+        console.error('Failed to queue offline sale:', error);
+        showToast('Failed to add sale. Please try again.', 'error');
+        return;
+    }
+
+    showToast('Saved offline. It will sync when you are back online.', 'warning');
+    document.getElementById('saleForm').reset();
+    loadProducts();
+    loadPaymentMethods();
+
+    // Let the service worker replay the queue even if this page is closed
+    if ('serviceWorker' in navigator && 'SyncManager' in window) {
+        try {
+            const registration = await navigator.serviceWorker.ready;
+            await registration.sync.register('background-sync');
+        } catch (error) {
+            console.error('Background sync registration failed:', error);
+        }
+    }
+}
+
+let offlineSyncInProgress = false;
+
+async function syncOfflineSales() {
+    if (offlineSyncInProgress || !navigator.onLine) return;
+    offlineSyncInProgress = true;
+
+    let created = 0;
+    let rejected = 0;
+    try {
+        const queued = await withSaleQueue('readonly', store => store.getAll());
+        for (let i = 0; i < queued.length; i += SALE_SYNC_BATCH_SIZE) {
+            const batch = queued.slice(i, i + SALE_SYNC_BATCH_SIZE);
+            const data = await apiRequest('/sales/sync/', {
+                method: 'POST',
+                body: JSON.stringify(batch.map(entry => entry.sale))
+            });
+
+            await settleSyncedSales(batch, data.results);
+            created += data.created;
+            rejected += data.results.filter(result => result && result.status === 'rejected').length;
+        }
+    } catch (error) {
+        console.error('Failed to sync offline sales:', error);
+    } finally {
+        offlineSyncInProgress = false;
+    }
+
+    onOfflineSalesSynced(created, rejected);
+}
+
+function onOfflineSalesSynced(created, rejected) {
+    if (created > 0) {
+        showToast(`Synced ${created} offline sale${created === 1 ? '' : 's'} 🎉`);
+        loadDashboardData();
+        loadTodaySalesCount();
+        loadStockData();
+    }
+    if (rejected > 0) {
+        showToast(`${rejected} offline sale${rejected === 1 ? ' was' : 's were'} rejected (out of stock or invalid) and kept on this device for review`, 'error');
+    }
+}
+
+// Live sales feed
+// When the app is served over ASGI, /api/events/ pushes every committed sale
+// with the updated totals, and every stock alert, so open dashboards don't
+// need to poll.
+let salesFeed = null;
+let salesFeedOpened = false;
+
+function connectSalesFeed() {
+    if (!window.EventSource || salesFeed) return;
+
+    salesFeed = new EventSource('/api/events/');
+    salesFeed.addEventListener('open', () => {
+        // Catch up on sales missed while reconnecting
+        if (salesFeedOpened) {
+            loadDashboardData();
+        }
+        salesFeedOpened = true;
+    });
+    salesFeed.addEventListener('sales', event => applySalesEvent(JSON.parse(event.data)));
+    salesFeed.addEventListener('stock', event => applyStockEvent(JSON.parse(event.data)));
+    salesFeed.addEventListener('resync', () => loadDashboardData());
+    salesFeed.addEventListener('error', () => {
+        // Closed for good (e.g. served over WSGI); fall back to fetching
+        if (salesFeed.readyState === EventSource.CLOSED) {
+            salesFeed = null;
+        }
+    });
+}
+
+function isSalesFeedLive() {
+    return salesFeed !== null && salesFeed.readyState === EventSource.OPEN;
+}
+
+function applySalesEvent(data) {
+    document.getElementById('todaySales').textContent = data.today_total.toLocaleString();
+    document.getElementById('todayTransactions').textContent = data.today_count;
+    document.getElementById('monthlyRevenue').textContent = data.monthly_total.toLocaleString();
+
+    if (document.getElementById('today').classList.contains('active')) {
+        const tbody = document.getElementById('todaySalesBody');
+        if (!tbody.querySelector('tr[data-sale-id]')) {
+            tbody.innerHTML = '';
+        }
+        tbody.insertAdjacentHTML('afterbegin', data.sales.map(todaySaleRow).join(''));
+    }
+}
+
+// Products running low, running out or restocked, as recorded when their
+// stock changed (also listed at /api/stock-alerts/)
+function applyStockEvent(data) {
+    const messages = data.alerts.map(stockAlertMessage);
+    messages.forEach((message, index) => {
+        showToast(message, data.alerts[index].status === 'ok' ? 'success' : 'warning');
+    });
+    loadStockData();
+
+    // The service worker shows them as notifications, like pushed ones
+    if (window.Notification && Notification.permission === 'granted' &&
+        navigator.serviceWorker && navigator.serviceWorker.controller) {
+        navigator.serviceWorker.controller.postMessage({
+            type: 'notify',
+            notifications: data.alerts.map((alert, index) => ({
+                body: messages[index],
+                tag: `stock-${alert.product}`
+            }))
+        });
+    }
+}
+
+function stockAlertMessage(alert) {
+    if (alert.status === 'out') {
+        return `${alert.product_name} is out of stock`;
+    }
+    if (alert.status === 'low') {
+        return `${alert.product_name} is running low (${alert.stock_quantity} left)`;
+    }
+    return `${alert.product_name} is back in stock (${alert.stock_quantity})`;
+}
+
 function showQuickSale(item, price) {
     // Find and select the appropriate product
     const productSelect = document.getElementById('saleProduct');
@@ -787,33 +1034,63 @@ function showQuickSale(item, price) {
     document.getElementById('saleQuantity').focus();
 }
 
+// Cursor URL of the next page of today's sales, null on the last page
+let todaySalesNext = null;
+
 // Load today's sales
 async function loadTodaysSales() {
     try {
         const data = await apiRequest('/sales/today/');
-        displayTodaysSales(data);
+        todaySalesNext = data.next;
+        displayTodaysSales(data.results);
     } catch (error) {
         console.error('Failed to load today\'s sales:', error);
         showAlert('Failed to load today\'s sales', 'error');
     }
 }
 
-function displayTodaysSales(sales) {
-    const container = document.getElementById('todaySalesContainer');
-    const loading = document.getElementById('todaySalesLoading');
-    const tbody = document.getElementById('todaySalesBody');
+// Append the next page of today's sales
+async function loadMoreTodaysSales() {
+    if (!todaySalesNext) return;
 
-    if (sales.length === 0) {
-        tbody.innerHTML = '<tr><td colspan="4" style="text-align: center; color: #666;">No sales today</td></tr>';
-    } else {
-        tbody.innerHTML = sales.map(sale => `
-            <tr>
+    try {
+        const next = new URL(todaySalesNext, window.location.origin);
+        const data = await apiRequest(next.pathname.replace(/^\/api/, '') + next.search);
+        todaySalesNext = data.next;
+        displayTodaysSales(data.results, true);
+    } catch (error) {
+        console.error('Failed to load more sales:', error);
+        showAlert('Failed to load more sales', 'error');
+    }
+}
+
+function todaySaleRow(sale) {
+    return `
+            <tr data-sale-id="${sale.id}">
                 <td>${new Date(sale.created_at).toLocaleTimeString()}</td>
                 <td>${sale.product_name}</td>
                 <td>${sale.quantity}</td>
                 <td>৳${sale.total_amount}</td>
             </tr>
-        `).join('');
+        `;
+}
+
+function displayTodaysSales(sales, append = false) {
+    const container = document.getElementById('todaySalesContainer');
+    const loading = document.getElementById('todaySalesLoading');
+    const tbody = document.getElementById('todaySalesBody');
+
+    document.getElementById('todaySalesMore').style.display = todaySalesNext ? 'block' : 'none';
+
+    if (sales.length === 0 && !append) {
+        tbody.innerHTML = '<tr><td colspan="4" style="text-align: center; color: #666;">No sales today</td></tr>';
+    } else {
+        const rows = sales.map(todaySaleRow).join('');
+        if (append) {
+            tbody.insertAdjacentHTML('beforeend', rows);
+        } else {
+            tbody.innerHTML = rows;
+        }
     }
 
     loading.style.display = 'none';